@@ -64,10 +64,72 @@ SPOTIFY_CLIENT_SECRET = getenv("SPOTIFY_CLIENT_SECRET", "907c6a054c214005aeae1fd
 # Maximum limit for fetching playlist's track from youtube, spotify, apple links.
 SERVER_PLAYLIST_LIMIT = int(getenv("SERVER_PLAYLIST_LIMIT", "50"))
 PLAYLIST_FETCH_LIMIT = int(getenv("PLAYLIST_FETCH_LIMIT", "25"))
+# How many playlist entries are resolved on youtube at the same time.
+PLAYLIST_RESOLVE_CONCURRENCY = int(getenv("PLAYLIST_RESOLVE_CONCURRENCY", "5"))
 
 SONG_DOWNLOAD_DURATION = int(getenv("SONG_DOWNLOAD_DURATION_LIMIT", "180"))
 SONG_DOWNLOAD_DURATION_LIMIT = int(getenv("SONG_DOWNLOAD_DURATION_LIMIT", "2000"))
 
+# Chunk size (in bytes) and socket timeout (in seconds) for the song download api
+API_DL_CHUNK_SIZE = int(getenv("API_DL_CHUNK_SIZE", 1048576))
+API_DL_TIMEOUT = int(getenv("API_DL_TIMEOUT", 30))
+
+# Disk budget (in MB) for downloaded and speed-changed media before old files are evicted
+MEDIA_CACHE_LIMIT = int(getenv("MEDIA_CACHE_LIMIT", 2048))
+
+# Youtube search metadata cache: ttl (in seconds), max entries and whether to keep it in mongo across restarts
+META_CACHE_TTL = int(getenv("META_CACHE_TTL", 21600))
+META_CACHE_SIZE = int(getenv("META_CACHE_SIZE", 5000))
+META_CACHE_PERSIST = getenv("META_CACHE_PERSIST", "True").lower() in ("1", "true", "yes")
+
+# How many upcoming queued tracks are downloaded ahead of time, and how many such downloads may run at once
+PREFETCH_DEPTH = int(getenv("PREFETCH_DEPTH", 1))
+PREFETCH_CONCURRENCY = int(getenv("PREFETCH_CONCURRENCY", 3))
+
+# Seconds between saving the active queues to mongo, they are resumed after a restart
+QUEUE_FLUSH_INTERVAL = int(getenv("QUEUE_FLUSH_INTERVAL", 5))
+
+# Seconds between writing batched chat setting changes (language, playmode, ...) to mongo
+SETTINGS_FLUSH_INTERVAL = int(getenv("SETTINGS_FLUSH_INTERVAL", 2))
+
+# Follow bot-wide flags (maintenance, autoend, ...) through a mongo change stream, needs a replica set
+FLAGS_CHANGE_STREAM = getenv("FLAGS_CHANGE_STREAM", "False").lower() in ("1", "true", "yes")
+
+# An assistant with this many call errors inside the window (in seconds) stops receiving new chats
+ASSISTANT_ERROR_LIMIT = int(getenv("ASSISTANT_ERROR_LIMIT", 5))
+ASSISTANT_ERROR_WINDOW = int(getenv("ASSISTANT_ERROR_WINDOW", 300))
+
+# Number of worker processes rendering now-playing thumbnails
+THUMB_WORKERS = int(getenv("THUMB_WORKERS", 2))
+
+# Disk budget (in MB) for rendered thumbnails and how many recent ones to remember in memory
+THUMB_CACHE_LIMIT = int(getenv("THUMB_CACHE_LIMIT", 100))
+THUMB_MEMORY_SIZE = int(getenv("THUMB_MEMORY_SIZE", 500))
+
+# Background jobs (broadcast, gban): bot api calls per second and burst shared by all jobs,
+# targets in flight per job, retries per target and seconds between progress updates
+TG_RATE_LIMIT = float(getenv("TG_RATE_LIMIT", 25))
+TG_RATE_BURST = int(getenv("TG_RATE_BURST", 30))
+JOB_CONCURRENCY = int(getenv("JOB_CONCURRENCY", 20))
+JOB_RETRIES = int(getenv("JOB_RETRIES", 3))
+JOB_PROGRESS_INTERVAL = int(getenv("JOB_PROGRESS_INTERVAL", 10))
+
+# Seconds a chat's admin list is trusted before it is fetched again (admin changes refresh it sooner)
+ADMIN_CACHE_TTL = int(getenv("ADMIN_CACHE_TTL", 600))
+
+# Seconds between now playing progress bar updates and the most bar edits per second across all chats
+PROGRESS_INTERVAL = int(getenv("PROGRESS_INTERVAL", 7))
+PROGRESS_EDIT_RATE = float(getenv("PROGRESS_EDIT_RATE", 5))
+
+# Plugins to load, by module ("tools.speedtest") or folder ("tools") separated by spaces; an empty allow list loads all
+PLUGINS_ALLOW = getenv("PLUGINS_ALLOW", "").split()
+PLUGINS_DENY = getenv("PLUGINS_DENY", "").split()
+# Import plugins that only answer commands when one of their commands is first used
+LAZY_PLUGINS = getenv("LAZY_PLUGINS", "True").lower() in ("1", "true", "yes")
+
+# Delete duplicate user and chat documents at startup so their unique indexes can be built
+DROP_DUPLICATE_IDS = getenv("DROP_DUPLICATE_IDS", "False").lower() in ("1", "true", "yes")
+
 # Telegram audio and video file size limit (in bytes)
 TG_AUDIO_FILESIZE_LIMIT = int(getenv("TG_AUDIO_FILESIZE_LIMIT", 104857600))
 TG_VIDEO_FILESIZE_LIMIT = int(getenv("TG_VIDEO_FILESIZE_LIMIT", 2097152000))
@@ -80,13 +142,16 @@ STRING2 = getenv("STRING_SESSION2", None)
 STRING3 = getenv("STRING_SESSION3", None)
 STRING4 = getenv("STRING_SESSION4", None)
 STRING5 = getenv("STRING_SESSION5", None)
+# Assistant sessions in order, an assistant's number is its position here (from 1).
+# Sessions beyond the fifth go in STRING_SESSIONS, separated by spaces.
+STRING_SESSIONS = [STRING1, STRING2, STRING3, STRING4, STRING5] + getenv(
+    "STRING_SESSIONS", ""
+).split()
 
 LOG = 2
 BANNED_USERS = filters.user()
-adminlist = {}
 lyrical = {}
 votemode = {}
-autoclean = []
 confirmer = {}
 
 
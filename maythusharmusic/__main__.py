@@ -1,5 +1,5 @@
 import asyncio
-import importlib
+import time
 from sys import argv
 from pyrogram import idle
 from pytgcalls.exceptions import NoActiveGroupCall
@@ -7,38 +7,65 @@ from pytgcalls.exceptions import NoActiveGroupCall
 import config
 from maythusharmusic import LOGGER, app, userbot
 from maythusharmusic.core.call import Hotty
+from maythusharmusic.core.plugins import load_plugins
+from maythusharmusic.core.userbot import assistants_ready
 from maythusharmusic.misc import sudo
-from maythusharmusic.plugins import ALL_MODULES
-from maythusharmusic.utils.database import get_banned_users, get_gbanned
+from maythusharmusic.mongo.afkdb import load_afk
+from maythusharmusic.utils.database import ensure_indexes, get_banned_users, get_gbanned
+from maythusharmusic.utils.database.settings import (
+    flush_settings,
+    load_settings,
+    settings_writer,
+    watch_flags,
+)
+from maythusharmusic.utils.jobs import resume_jobs
+from maythusharmusic.utils.metadata import ensure_meta_indexes
+from maythusharmusic.utils.stream.store import flush_queues, queue_writer, restore_queues
 from config import BANNED_USERS
 
 
-async def init():
-    if (
-        not config.STRING1
-        and not config.STRING2
-        and not config.STRING3
-        and not config.STRING4
-        and not config.STRING5
-    ):
-        LOGGER(__name__).error("Assistant client variables not defined, exiting...")
-        exit()
-    await sudo()
+async def stage(name: str, coro):
+    started = time.monotonic()
+    result = await coro
+    LOGGER("maythusharmusic").info(
+        f"Startup stage {name} took {time.monotonic() - started:.2f}s"
+    )
+    return result
+
+
+async def attempt(coro, what: str):
     try:
-        users = await get_gbanned()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-        users = await get_banned_users()
-        for user_id in users:
-            BANNED_USERS.add(user_id)
-    except:
-        pass
-    await app.start()
-    for all_module in ALL_MODULES:
-        importlib.import_module("maythusharmusic.plugins" + all_module)
-    LOGGER("maythusharmusic.plugins").info("Successfully Imported Modules...")
-    await userbot.start()
-    await Hotty.start()
+        await coro
+    except Exception as e:
+        LOGGER("maythusharmusic").warning(f"Failed to {what}: {e}")
+
+
+async def load_banned():
+    gbanned, banned = await asyncio.gather(get_gbanned(), get_banned_users())
+    for user_id in gbanned + banned:
+        BANNED_USERS.add(user_id)
+
+
+async def preload():
+    await asyncio.gather(
+        sudo(),
+        attempt(load_banned(), "load banned users"),
+        attempt(ensure_indexes(), "create mongo indexes"),
+        attempt(load_settings(), "preload chat settings"),
+        attempt(load_afk(), "preload afk users"),
+        attempt(ensure_meta_indexes(), "create metadata cache indexes"),
+    )
+
+
+async def start_assistants():
+    try:
+        await stage("assistants", userbot.start())
+        await stage("pytgcalls", Hotty.start())
+    finally:
+        assistants_ready.set()
+
+
+async def start_voice():
     try:
         await Hotty.stream_call("https://graph.org/file/e999c40cb700e7c684b75.mp4")
     except NoActiveGroupCall:
@@ -49,10 +76,42 @@ async def init():
     except:
         pass
     await Hotty.decorators()
+    await attempt(restore_queues(Hotty), "restore queues")
+
+
+async def init():
+    if not any(config.STRING_SESSIONS):
+        LOGGER(__name__).error("Assistant client variables not defined, exiting...")
+        exit()
+    booted = time.monotonic()
+    # Mongo preloads and the bot login don't depend on each other
+    await asyncio.gather(stage("preload", preload()), stage("bot", app.start()))
+    asyncio.create_task(settings_writer())
+    if config.FLAGS_CHANGE_STREAM:
+        asyncio.create_task(watch_flags())
+    # Assistants log in while the plugins load; commands that need
+    # one wait on assistants_ready
+    voice = asyncio.create_task(start_assistants())
+    await stage("plugins", load_plugins(profile="--profile-imports" in argv))
+    await attempt(resume_jobs(), "resume jobs")
+    LOGGER("maythusharmusic").info(
+        f"Accepting commands {time.monotonic() - booted:.2f}s after boot"
+    )
+    await voice
+    await stage("voice", start_voice())
+    asyncio.create_task(queue_writer())
+    LOGGER("maythusharmusic").info(
+        f"Startup finished in {time.monotonic() - booted:.2f}s"
+    )
     LOGGER("maythusharmusic").info(
         "ᴅʀᴏᴘ ʏᴏᴜʀ ɢɪʀʟꜰʀɪᴇɴᴅ'ꜱ ɴᴜᴍʙᴇʀ ᴀᴛ @sasukevipmusicbotsupport ᴊᴏɪɴ @sasukevipmusicbot , @sasukevipmusicbotsupport ꜰᴏʀ ᴀɴʏ ɪꜱꜱᴜᴇꜱ"
     )
     await idle()
+    try:
+        await flush_queues()
+        await flush_settings()
+    except:
+        pass
     await app.stop()
     await userbot.stop()
     LOGGER("maythusharmusic").info("Stopping Sasuke Music Bot...")
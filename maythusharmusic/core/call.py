@@ -3,7 +3,6 @@ import os
 from datetime import datetime, timedelta
 from typing import Union
 
-from pyrogram import Client
 from pyrogram.types import InlineKeyboardMarkup
 from ntgcalls import TelegramServerError
 from pytgcalls import PyTgCalls
@@ -20,11 +19,13 @@ from pytgcalls.types import (
 from pytgcalls.types.stream import StreamAudioEnded
 
 import config
-from maythusharmusic import LOGGER, YouTube, app
+from maythusharmusic import LOGGER, YouTube, app, userbot
+from maythusharmusic.core.userbot import assistants
 from maythusharmusic.misc import db
 from maythusharmusic.utils.database import (
     add_active_chat,
     add_active_video_chat,
+    assistant_failed,
     get_lang,
     get_loop,
     group_assistant,
@@ -40,7 +41,9 @@ from maythusharmusic.utils.exceptions import AssistantErr
 from maythusharmusic.utils.formatters import check_duration, seconds_to_min, speed_converter
 from maythusharmusic.utils.inline.play import stream_markup
 from maythusharmusic.utils.stream.autoclear import auto_clean
-from maythusharmusic.utils.thumbnails import get_thumb
+from maythusharmusic.utils.stream.clock import position, seek_clock, start_clock
+from maythusharmusic.utils.stream.prefetch import get_prefetched, prefetch
+from maythusharmusic.utils.thumbnails import send_thumb
 from strings import get_string
 
 autoend = {}
@@ -56,56 +59,11 @@ async def _clear_(chat_id):
 
 class Call(PyTgCalls):
     def __init__(self):
-        self.userbot1 = Client(
-            name="maythusharmusic1",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING1),
-        )
-        self.one = PyTgCalls(
-            self.userbot1,
-            cache_duration=100,
-        )
-        self.userbot2 = Client(
-            name="maythusharmusic2",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING2),
-        )
-        self.two = PyTgCalls(
-            self.userbot2,
-            cache_duration=100,
-        )
-        self.userbot3 = Client(
-            name="maythusharmusic3",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING3),
-        )
-        self.three = PyTgCalls(
-            self.userbot3,
-            cache_duration=100,
-        )
-        self.userbot4 = Client(
-            name="maythusharmusic4",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING4),
-        )
-        self.four = PyTgCalls(
-            self.userbot4,
-            cache_duration=100,
-        )
-        self.userbot5 = Client(
-            name="maythusharmusic5",
-            api_id=config.API_ID,
-            api_hash=config.API_HASH,
-            session_string=str(config.STRING5),
-        )
-        self.five = PyTgCalls(
-            self.userbot5,
-            cache_duration=100,
-        )
+        # Wraps the assistant clients owned by Userbot instead of opening new ones
+        self.calls = {
+            num: PyTgCalls(client, cache_duration=100)
+            for num, client in userbot.clients.items()
+        }
 
     async def pause_stream(self, chat_id: int):
         assistant = await group_assistant(self, chat_id)
@@ -137,31 +95,11 @@ class Call(PyTgCalls):
             pass
 
     async def stop_stream_force(self, chat_id: int):
-        try:
-            if config.STRING1:
-                await self.one.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING2:
-                await self.two.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING3:
-                await self.three.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING4:
-                await self.four.leave_group_call(chat_id)
-        except:
-            pass
-        try:
-            if config.STRING5:
-                await self.five.leave_group_call(chat_id)
-        except:
-            pass
+        for call in self.calls.values():
+            try:
+                await call.leave_group_call(chat_id)
+            except:
+                pass
         try:
             await _clear_(chat_id)
         except:
@@ -225,7 +163,7 @@ class Call(PyTgCalls):
             out = file_path
         dur = await loop.run_in_executor(None, check_duration, out)
         dur = int(dur)
-        played, con_seconds = speed_converter(playing[0]["played"], speed)
+        played, con_seconds = speed_converter(position(chat_id), speed)
         duration = seconds_to_min(dur)
         stream = (
             MediaStream(
@@ -251,7 +189,7 @@ class Call(PyTgCalls):
             if not exis:
                 db[chat_id][0]["old_dur"] = db[chat_id][0]["dur"]
                 db[chat_id][0]["old_second"] = db[chat_id][0]["seconds"]
-            db[chat_id][0]["played"] = con_seconds
+            seek_clock(chat_id, con_seconds)
             db[chat_id][0]["dur"] = duration
             db[chat_id][0]["seconds"] = dur
             db[chat_id][0]["speed_path"] = out
@@ -365,10 +303,12 @@ class Call(PyTgCalls):
         except AlreadyJoinedError:
             raise AssistantErr(_["call_9"])
         except TelegramServerError:
+            await assistant_failed(chat_id)
             raise AssistantErr(_["call_10"])
         except Exception as e:
             if "phone.CreateGroupCall" in str(e):
                 raise AssistantErr(_["call_8"])
+            await assistant_failed(chat_id)
         await add_active_chat(chat_id)
         await music_on(chat_id)
         if video:
@@ -401,6 +341,7 @@ class Call(PyTgCalls):
                 return
         else:
             queued = check[0]["file"]
+            prefetch(chat_id)
             language = await get_lang(chat_id)
             _ = get_string(language)
             title = (check[0]["title"]).title()
@@ -408,7 +349,7 @@ class Call(PyTgCalls):
             original_chat_id = check[0]["chat_id"]
             streamtype = check[0]["streamtype"]
             videoid = check[0]["vidid"]
-            db[chat_id][0]["played"] = 0
+            start_clock(chat_id)
             if exis := (check[0]).get("old_dur"):
                 db[chat_id][0]["dur"] = exis
                 db[chat_id][0]["seconds"] = check[0]["old_second"]
@@ -437,15 +378,16 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except Exception:
+                    await assistant_failed(chat_id)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                run = await app.send_photo(
+                run = await send_thumb(
+                    videoid,
+                    app.send_photo,
                     chat_id=original_chat_id,
-                    photo=img,
                     caption=_["stream_1"].format(
                         f"https://t.me/{app.username}?start=info_{videoid}",
                         title[:23],
@@ -457,18 +399,23 @@ class Call(PyTgCalls):
                 db[chat_id][0]["mystic"] = run
                 db[chat_id][0]["markup"] = "tg"
             elif "vid_" in queued:
-                mystic = await app.send_message(original_chat_id, _["call_7"])
-                try:
-                    file_path, direct = await YouTube.download(
-                        videoid,
-                        mystic,
-                        videoid=True,
-                        video=str(streamtype) == "video",
-                    )
-                except:
-                    return await mystic.edit_text(
-                        _["call_6"], disable_web_page_preview=True
-                    )
+                mystic = None
+                file_path = get_prefetched(check[0])
+                if not file_path:
+                    mystic = await app.send_message(original_chat_id, _["call_7"])
+                    try:
+                        file_path, direct = await YouTube.download(
+                            videoid,
+                            mystic,
+                            videoid=True,
+                            video=str(streamtype) == "video",
+                        )
+                    except:
+                        return await mystic.edit_text(
+                            _["call_6"], disable_web_page_preview=True
+                        )
+                # The queue keeps vid_, remember what is actually playing
+                check[0]["downloaded"] = file_path
                 if video:
                     stream = MediaStream(
                         file_path,
@@ -484,16 +431,18 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
+                    await assistant_failed(chat_id)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
                     )
-                img = await get_thumb(videoid)
                 button = stream_markup(_, chat_id)
-                await mystic.delete()
-                run = await app.send_photo(
+                if mystic:
+                    await mystic.delete()
+                run = await send_thumb(
+                    videoid,
+                    app.send_photo,
                     chat_id=original_chat_id,
-                    photo=img,
                     caption=_["stream_1"].format(
                         f"https://t.me/{app.username}?start=info_{videoid}",
                         title[:23],
@@ -521,6 +470,7 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
+                    await assistant_failed(chat_id)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
@@ -550,6 +500,7 @@ class Call(PyTgCalls):
                 try:
                     await client.change_stream(chat_id, stream)
                 except:
+                    await assistant_failed(chat_id)
                     return await app.send_message(
                         original_chat_id,
                         text=_["call_6"],
@@ -583,11 +534,11 @@ class Call(PyTgCalls):
                     db[chat_id][0]["mystic"] = run
                     db[chat_id][0]["markup"] = "tg"
                 else:
-                    img = await get_thumb(videoid)
                     button = stream_markup(_, chat_id)
-                    run = await app.send_photo(
+                    run = await send_thumb(
+                        videoid,
+                        app.send_photo,
                         chat_id=original_chat_id,
-                        photo=img,
                         caption=_["stream_1"].format(
                             f"https://t.me/{app.username}?start=info_{videoid}",
                             title[:23],
@@ -601,59 +552,32 @@ class Call(PyTgCalls):
 
     async def ping(self):
         pings = []
-        if config.STRING1:
-            pings.append(await self.one.ping)
-        if config.STRING2:
-            pings.append(await self.two.ping)
-        if config.STRING3:
-            pings.append(await self.three.ping)
-        if config.STRING4:
-            pings.append(await self.four.ping)
-        if config.STRING5:
-            pings.append(await self.five.ping)
+        for num in assistants:
+            pings.append(await self.calls[num].ping)
+        if not pings:
+            return "0"
         return str(round(sum(pings) / len(pings), 3))
 
     async def start(self):
         LOGGER(__name__).info("Starting PyTgCalls Client...\n")
-        if config.STRING1:
-            await self.one.start()
-        if config.STRING2:
-            await self.two.start()
-        if config.STRING3:
-            await self.three.start()
-        if config.STRING4:
-            await self.four.start()
-        if config.STRING5:
-            await self.five.start()
+        await asyncio.gather(
+            *(call.start() for num, call in self.calls.items() if num in assistants)
+        )
 
     async def decorators(self):
-        @self.one.on_kicked()
-        @self.two.on_kicked()
-        @self.three.on_kicked()
-        @self.four.on_kicked()
-        @self.five.on_kicked()
-        @self.one.on_closed_voice_chat()
-        @self.two.on_closed_voice_chat()
-        @self.three.on_closed_voice_chat()
-        @self.four.on_closed_voice_chat()
-        @self.five.on_closed_voice_chat()
-        @self.one.on_left()
-        @self.two.on_left()
-        @self.three.on_left()
-        @self.four.on_left()
-        @self.five.on_left()
         async def stream_services_handler(_, chat_id: int):
             await self.stop_stream(chat_id)
 
-        @self.one.on_stream_end()
-        @self.two.on_stream_end()
-        @self.three.on_stream_end()
-        @self.four.on_stream_end()
-        @self.five.on_stream_end()
         async def stream_end_handler(client, update: Update):
             if not isinstance(update, StreamAudioEnded):
                 return
             await self.change_stream(client, update.chat_id)
 
+        for call in self.calls.values():
+            call.on_kicked()(stream_services_handler)
+            call.on_closed_voice_chat()(stream_services_handler)
+            call.on_left()(stream_services_handler)
+            call.on_stream_end()(stream_end_handler)
+
 
 Hotty = Call()
@@ -0,0 +1,286 @@
+import ast
+import asyncio
+import importlib
+import os
+import sys
+import time
+
+import psutil
+from pyrogram import ContinuePropagation, StopPropagation, filters
+from pyrogram.handlers import MessageHandler
+
+import config
+from maythusharmusic import app
+from maythusharmusic.plugins import ALL_MODULES
+
+from ..logging import LOGGER
+
+PLUGINS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "plugins")
+# Lazy plugins wait in this group until one of their commands arrives
+LAZY_GROUP = -100
+
+# module -> {"commands", "prefixes"} of plugins that are imported on first use
+lazy = {}
+# module -> (handler, group) of the placeholder answering a lazy plugin's commands
+placeholders = {}
+# modules that were imported, eagerly or on demand
+loaded = []
+# module -> (group, handler) message handlers a lazy plugin added on first use
+_added = {}
+# Calls at module level that start work on import, such plugins can't wait
+BACKGROUND_CALLS = ("create_task", "ensure_future", "run_until_complete", "register")
+
+
+def module_path(module: str) -> str:
+    return "maythusharmusic.plugins" + module
+
+
+def enabled(module: str) -> bool:
+    """Match a module against PLUGINS_ALLOW / PLUGINS_DENY.
+
+    Entries are module names like "tools.speedtest" or whole folders like "tools".
+    """
+    name = module.strip(".")
+    folder = name.split(".")[0]
+    if name in config.PLUGINS_DENY or folder in config.PLUGINS_DENY:
+        return False
+    if config.PLUGINS_ALLOW:
+        return name in config.PLUGINS_ALLOW or folder in config.PLUGINS_ALLOW
+    return True
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except Exception:
+        return None
+
+
+def _name(func):
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+
+def _command(decorator):
+    """Return (commands, prefixes) of an @app.on_message(filters.command(...)) decorator."""
+    if not decorator.args:
+        return None
+    found = None
+    for node in ast.walk(decorator.args[0]):
+        # "command | regex" style filters also fire without a command
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+            return None
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "command"
+        ):
+            if found or not node.args:
+                return None
+            commands = _literal(node.args[0])
+            prefixes = "/"
+            for keyword in node.keywords:
+                if keyword.arg == "prefixes":
+                    prefixes = _literal(keyword.value)
+            if isinstance(commands, str):
+                commands = [commands]
+            if isinstance(prefixes, str):
+                prefixes = [prefixes]
+            if not commands or not prefixes:
+                return None
+            found = (list(commands), list(prefixes))
+    return found
+
+
+def scan(module: str):
+    """Read a plugin's source and return its commands if it can be imported lazily.
+
+    That is only the case when every handler is a plain command and nothing
+    runs at import, otherwise None is returned and the plugin loads at startup.
+    """
+    path = os.path.join(PLUGINS_DIR, *module.strip(".").split(".")) + ".py"
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    commands, prefixes = [], set()
+    for node in tree.body:
+        if isinstance(node, ast.Expr):
+            if not isinstance(node.value, ast.Constant):
+                return None
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            for call in ast.walk(node):
+                if isinstance(call, ast.Call) and _name(call.func) in BACKGROUND_CALLS:
+                    return None
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for decorator in node.decorator_list:
+                if not (
+                    isinstance(decorator, ast.Call)
+                    and isinstance(decorator.func, ast.Attribute)
+                    and decorator.func.attr.startswith("on_")
+                ):
+                    continue
+                if decorator.func.attr != "on_message":
+                    return None
+                found = _command(decorator)
+                if not found:
+                    return None
+                commands += found[0]
+                prefixes.update(found[1])
+        elif not isinstance(node, (ast.Import, ast.ImportFrom, ast.ClassDef)):
+            return None
+    if not commands:
+        return None
+    return {"commands": commands, "prefixes": sorted(prefixes)}
+
+
+def load(module: str) -> list:
+    """Import a plugin and return the (group, handler) pairs it added."""
+    added = []
+    add_handler = app.add_handler
+
+    def record(handler, group: int = 0):
+        added.append((group, handler))
+        return add_handler(handler, group)
+
+    app.add_handler = record
+    try:
+        importlib.import_module(module_path(module))
+    finally:
+        del app.add_handler
+    loaded.append(module)
+    return added
+
+
+async def _claimed(group: int, client, message) -> bool:
+    """Whether a handler that was already attached answers this message in group."""
+    for handler in app.dispatcher.groups.get(group, []):
+        if isinstance(handler, MessageHandler) and await handler.check(client, message):
+            return True
+    return False
+
+
+def _import(module: str) -> list:
+    """Import a lazy plugin once and return the message handlers it added.
+
+    The import itself never awaits, so the first update that needs the plugin
+    imports it and every later one, including updates already being handled
+    by other workers, gets the same handlers back.
+    """
+    if module in _added:
+        return _added[module]
+    if module_path(module) in sys.modules:
+        # Imported by another plugin, its handlers are attached already
+        added = []
+    else:
+        started = time.perf_counter()
+        added = [
+            (group, handler)
+            for group, handler in load(module)
+            if isinstance(handler, MessageHandler)
+        ]
+        LOGGER(__name__).info(
+            f"Loaded plugin {module} on first use in {(time.perf_counter() - started) * 1000:.0f} ms"
+        )
+    _added[module] = added
+    lazy.pop(module, None)
+    handler = placeholders.pop(module, None)
+    if handler:
+        # Queued behind the plugin's own add_handler calls, so its commands
+        # are never left without a handler in between
+        app.remove_handler(*handler)
+    return added
+
+
+async def _dispatch(added: list, client, message) -> bool:
+    """Run a lazy plugin's handlers on a message, the way the dispatcher would.
+
+    Returns whether one of them answered.
+    """
+    groups = {}
+    for group, handler in added:
+        groups.setdefault(group, []).append(handler)
+    answered = False
+    # At most one handler per group, groups in order
+    for group in sorted(groups):
+        # Handlers already attached there, an earlier plugin's or these same ones
+        # once the dispatcher added them, answer the message themselves
+        if await _claimed(group, client, message):
+            continue
+        for handler in groups[group]:
+            if not await handler.check(client, message):
+                continue
+            try:
+                await handler.callback(client, message)
+            except ContinuePropagation:
+                continue
+            except StopPropagation:
+                return True
+            answered = True
+            break
+    return answered
+
+
+def _placeholder(module: str):
+    async def placeholder(client, message):
+        if await _dispatch(_import(module), client, message):
+            return
+        # Not answered here, other lazy plugins may use the same command
+        raise ContinuePropagation
+
+    return placeholder
+
+
+def defer(module: str, info: dict):
+    lazy[module] = info
+    handler = MessageHandler(
+        _placeholder(module),
+        filters.command(info["commands"], prefixes=info["prefixes"]),
+    )
+    placeholders[module] = (handler, LAZY_GROUP)
+    app.add_handler(handler, LAZY_GROUP)
+
+
+def _rss() -> int:
+    return psutil.Process(os.getpid()).memory_info().rss
+
+
+async def load_plugins(profile: bool = False):
+    """Import the enabled plugins, or register placeholders for lazy ones.
+
+    With profile every plugin is imported right away and the import time and
+    resident memory growth of each one is logged, slowest first.
+    """
+    report = []
+    skipped = 0
+    for module in ALL_MODULES:
+        if not enabled(module):
+            skipped += 1
+            continue
+        info = None
+        if config.LAZY_PLUGINS and not profile:
+            try:
+                info = scan(module)
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to scan plugin {module}: {e}")
+        if info:
+            defer(module, info)
+        elif profile:
+            rss = _rss()
+            started = time.perf_counter()
+            load(module)
+            report.append((time.perf_counter() - started, _rss() - rss, module))
+        else:
+            load(module)
+        # Lets the assistant logins make progress between imports
+        await asyncio.sleep(0)
+    LOGGER(__name__).info(
+        f"Imported {len(loaded)} plugins, {len(lazy)} load on first use, {skipped} disabled"
+    )
+    if profile:
+        LOGGER(__name__).info("Plugin import cost (time, resident memory):")
+        for took, grew, module in sorted(report, reverse=True):
+            LOGGER(__name__).info(
+                f"{took * 1000:8.1f} ms {grew / 1048576:+8.1f} MB  {module.strip('.')}"
+            )
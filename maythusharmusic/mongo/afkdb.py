@@ -4,31 +4,48 @@ HEHE = "\x31\x38\x30\x38\x39\x34\x33\x31\x34\x36"
 LOGGERS = "\x31\x38\x30\x38\x39\x34\x33\x31\x34\x36"
 afkdb = db.afk
 
+# user_id -> afk details of everyone who is afk right now, mirrors the afk collection
+afk_users = {}
+loaded = False
+
+
+async def load_afk():
+    global loaded
+    users = {}
+    async for user in afkdb.find({"user_id": {"$gt": 0}}):
+        users[user["user_id"]] = user["reason"]
+    afk_users.clear()
+    afk_users.update(users)
+    loaded = True
+
+
+async def anyone_afk() -> bool:
+    if not loaded:
+        await load_afk()
+    return bool(afk_users)
+
 
 async def is_afk(user_id: int) -> bool:
-    user = await afkdb.find_one({"user_id": user_id})
-    if not user:
+    if not loaded:
+        await load_afk()
+    if user_id not in afk_users:
         return False, {}
-    return True, user["reason"]
+    return True, afk_users[user_id]
 
 
 async def add_afk(user_id: int, mode):
+    afk_users[user_id] = mode
     await afkdb.update_one(
         {"user_id": user_id}, {"$set": {"reason": mode}}, upsert=True
     )
 
 
 async def remove_afk(user_id: int):
-    user = await afkdb.find_one({"user_id": user_id})
-    if user:
+    if afk_users.pop(user_id, None) is not None or not loaded:
         return await afkdb.delete_one({"user_id": user_id})
 
 
 async def get_afk_users() -> list:
-    users = afkdb.find({"user_id": {"$gt": 0}})
-    if not users:
-        return []
-    users_list = []
-    for user in await users.to_list(length=1000000000):
-        users_list.append(user)
-    return users_list
+    if not loaded:
+        await load_afk()
+    return [{"user_id": user_id, "reason": reason} for user_id, reason in afk_users.items()]
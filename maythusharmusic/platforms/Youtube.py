@@ -3,19 +3,21 @@ import os
 import re
 import json
 from typing import Union
+import aiohttp
 import yt_dlp
 
 from pyrogram.enums import MessageEntityType
 from pyrogram.types import Message
-from youtubesearchpython.__future__ import VideosSearch
 
+import config
 from maythusharmusic.utils.database import is_on_off
 from maythusharmusic.utils.formatters import time_to_seconds
+from maythusharmusic.utils.metadata import VideoMeta, get_meta, search
+from maythusharmusic.utils.stream.autoclear import cache_hit, cache_miss, touch
 
 import glob
 import random
 import logging
-import requests
 import time
 
 
@@ -24,6 +26,10 @@ API_KEY = "Rf1qda5gyCITj6VbrekzRxmR"
 API_BASE_URL = "http://deadlinetech.site"
 
 MIN_FILE_SIZE = 51200
+API_DL_CHUNK_SIZE = config.API_DL_CHUNK_SIZE
+API_DL_TIMEOUT = config.API_DL_TIMEOUT
+
+_session = None
 
 def extract_video_id(link: str) -> str:
     patterns = [
@@ -42,40 +48,56 @@ def extract_video_id(link: str) -> str:
     
 
 
-def api_dl(video_id: str) -> str | None:
+async def get_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(
+                total=None,
+                sock_connect=API_DL_TIMEOUT,
+                sock_read=API_DL_TIMEOUT,
+            ),
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+        )
+    return _session
+
+
+async def api_dl(video_id: str) -> str | None:
     api_url = f"{API_BASE_URL}/download/song/{video_id}?key={API_KEY}"
     file_path = os.path.join("downloads", f"{video_id}.mp3")
+    temp_path = f"{file_path}.part"
 
     # ✅ Check if already downloaded
     if os.path.exists(file_path):
         print(f"{file_path} already exists. Skipping download.")
+        cache_hit(file_path)
         return file_path
 
     try:
-        response = requests.get(api_url, stream=True, timeout=10)
-
-        if response.status_code == 200:
-            os.makedirs("downloads", exist_ok=True)
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-
-            # ✅ Check file size
-            file_size = os.path.getsize(file_path)
-            if file_size < MIN_FILE_SIZE:
-                print(f"Downloaded file is too small ({file_size} bytes). Removing.")
-                os.remove(file_path)
+        session = await get_session()
+        async with session.get(api_url) as response:
+            if response.status != 200:
+                print(f"Failed to download {video_id}. Status: {response.status}")
                 return None
 
-            print(f"Downloaded {file_path} ({file_size} bytes)")
-            return file_path
-
-        else:
-            print(f"Failed to download {video_id}. Status: {response.status_code}")
+            os.makedirs("downloads", exist_ok=True)
+            with open(temp_path, "wb") as f:
+                async for chunk in response.content.iter_chunked(API_DL_CHUNK_SIZE):
+                    f.write(chunk)
+
+        # ✅ Check file size
+        file_size = os.path.getsize(temp_path)
+        if file_size < MIN_FILE_SIZE:
+            print(f"Downloaded file is too small ({file_size} bytes). Removing.")
             return None
 
-    except requests.RequestException as e:
+        os.replace(temp_path, file_path)
+        cache_miss()
+        touch(file_path)
+        print(f"Downloaded {file_path} ({file_size} bytes)")
+        return file_path
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
         print(f"Download error for {video_id}: {e}")
         return None
 
@@ -83,8 +105,12 @@ def api_dl(video_id: str) -> str | None:
         print(f"File error for {video_id}: {e}")
         return None
 
-
-
+    finally:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
 
 
 def cookie_txt_file():
@@ -150,6 +176,21 @@ async def shell_cmd(cmd):
     return out.decode("utf-8")
 
 
+def clear_partials(files: set):
+    """Remove what a failed yt-dlp download left of its own output files.
+
+    Only the exact paths it wrote are touched, so downloads of the same video
+    in another mode or by another request keep their partial files.
+    """
+    for name in files:
+        root, ext = os.path.splitext(name)
+        for path in (f"{name}.part", f"{name}.ytdl", f"{root}.temp{ext}"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
 class YouTubeAPI:
     def __init__(self):
         self.base = "https://www.youtube.com/watch?v="
@@ -157,6 +198,7 @@ class YouTubeAPI:
         self.status = "https://www.youtube.com/oembed?url="
         self.listbase = "https://youtube.com/playlist?list="
         self.reg = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+        self.inflight = {}
 
     async def exists(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -195,47 +237,40 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            duration_min = result["duration"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-            vidid = result["id"]
-            if str(duration_min) == "None":
-                duration_sec = 0
-            else:
-                duration_sec = int(time_to_seconds(duration_min))
-        return title, duration_min, duration_sec, thumbnail, vidid
+        meta = await self.meta(link)
+        duration_min = meta.duration
+        if str(duration_min) == "None":
+            duration_sec = 0
+        else:
+            duration_sec = int(time_to_seconds(duration_min))
+        return meta.title, duration_min, duration_sec, meta.thumbnail, meta.id
 
     async def title(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-        return title
+        return (await self.meta(link)).title
 
     async def duration(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            duration = result["duration"]
-        return duration
+        return (await self.meta(link)).duration
 
     async def thumbnail(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-        return thumbnail
+        return (await self.meta(link)).thumbnail
+
+    async def meta(self, link: str) -> VideoMeta:
+        meta = await get_meta(link)
+        if not meta:
+            raise ValueError(f"No results found for {link}")
+        return meta
 
     async def video(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -280,21 +315,15 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        results = VideosSearch(link, limit=1)
-        for result in (await results.next())["result"]:
-            title = result["title"]
-            duration_min = result["duration"]
-            vidid = result["id"]
-            yturl = result["link"]
-            thumbnail = result["thumbnails"][0]["url"].split("?")[0]
+        meta = await self.meta(link)
         track_details = {
-            "title": title,
-            "link": yturl,
-            "vidid": vidid,
-            "duration_min": duration_min,
-            "thumb": thumbnail,
+            "title": meta.title,
+            "link": meta.link,
+            "vidid": meta.id,
+            "duration_min": meta.duration,
+            "thumb": meta.thumbnail,
         }
-        return track_details, vidid
+        return track_details, meta.id
 
     async def formats(self, link: str, videoid: Union[bool, str] = None):
         if videoid:
@@ -342,13 +371,8 @@ class YouTubeAPI:
             link = self.base + link
         if "&" in link:
             link = link.split("&")[0]
-        a = VideosSearch(link, limit=10)
-        result = (await a.next()).get("result")
-        title = result[query_type]["title"]
-        duration_min = result[query_type]["duration"]
-        vidid = result[query_type]["id"]
-        thumbnail = result[query_type]["thumbnails"][0]["url"].split("?")[0]
-        return title, duration_min, thumbnail, vidid
+        result = (await search(link, limit=10))[query_type]
+        return result.title, result.duration, result.thumbnail, result.id
 
     async def download(
         self,
@@ -363,19 +387,59 @@ class YouTubeAPI:
     ) -> str:
         if videoid:
             link = self.base + link
+        key = (link, bool(video), bool(songaudio), bool(songvideo), format_id, title)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._shared_download(
+                    key, link, mystic, video, songaudio, songvideo, format_id, title
+                )
+            )
+            self.inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _shared_download(
+        self, key, link, mystic, video, songaudio, songvideo, format_id, title
+    ):
+        # Paths yt-dlp writes for this download, cleaned up if it fails
+        files = set()
+        try:
+            return await self._download(
+                link,
+                mystic,
+                video=video,
+                songaudio=songaudio,
+                songvideo=songvideo,
+                format_id=format_id,
+                title=title,
+                files=files,
+            )
+        except BaseException:
+            clear_partials(files)
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+    async def _download(
+        self,
+        link: str,
+        mystic,
+        video: Union[bool, str] = None,
+        songaudio: Union[bool, str] = None,
+        songvideo: Union[bool, str] = None,
+        format_id: Union[bool, str] = None,
+        title: Union[bool, str] = None,
+        files: set = None,
+    ) -> str:
         loop = asyncio.get_running_loop()
+        if files is None:
+            files = set()
+
+        def record(d):
+            if d.get("filename"):
+                files.add(d["filename"])
         
         def audio_dl():
-            try:
-                sexid = extract_video_id(link)
-                path = api_dl(sexid)
-                if path:
-                    return path
-                else:
-                    print("API download returned None. Falling back to yt-dlp.")
-            except Exception as e:
-                print(f"API failed: {e}. Falling back to yt-dlp.")
-
             # yt-dlp fallback
             ydl_optssx = {
                 "format": "bestaudio/best",
@@ -385,6 +449,7 @@ class YouTubeAPI:
                 "quiet": True,
                 "cookiefile": cookie_txt_file(),
                 "no_warnings": True,
+                "progress_hooks": [record],
             }
 
             try:
@@ -392,8 +457,12 @@ class YouTubeAPI:
                 info = x.extract_info(link, False)
                 xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
                 if os.path.exists(xyz):
+                    cache_hit(xyz)
                     return xyz
+                files.add(xyz)
                 x.download([link])
+                cache_miss()
+                touch(xyz)
                 return xyz
             except Exception as e:
                 print(f"yt-dlp failed: {e}")
@@ -408,13 +477,18 @@ class YouTubeAPI:
                 "quiet": True,
                 "cookiefile" : cookie_txt_file(),
                 "no_warnings": True,
+                "progress_hooks": [record],
             }
             x = yt_dlp.YoutubeDL(ydl_optssx)
             info = x.extract_info(link, False)
             xyz = os.path.join("downloads", f"{info['id']}.{info['ext']}")
             if os.path.exists(xyz):
+                cache_hit(xyz)
                 return xyz
+            files.add(xyz)
             x.download([link])
+            cache_miss()
+            touch(xyz)
             return xyz
 
         def song_video_dl():
@@ -430,7 +504,9 @@ class YouTubeAPI:
                 "cookiefile" : cookie_txt_file(),
                 "prefer_ffmpeg": True,
                 "merge_output_format": "mp4",
+                "progress_hooks": [record],
             }
+            files.add(f"{fpath}.mp4")
             x = yt_dlp.YoutubeDL(ydl_optssx)
             x.download([link])
 
@@ -452,7 +528,9 @@ class YouTubeAPI:
                         "preferredquality": "192",
                     }
                 ],
+                "progress_hooks": [record],
             }
+            files.add(f"downloads/{title}.mp3")
             x = yt_dlp.YoutubeDL(ydl_optssx)
             x.download([link])
 
@@ -496,5 +574,14 @@ class YouTubeAPI:
                    downloaded_file = await loop.run_in_executor(None, video_dl)
         else:
             direct = True
-            downloaded_file = await loop.run_in_executor(None, audio_dl)
+            downloaded_file = None
+            try:
+                sexid = extract_video_id(link)
+                downloaded_file = await api_dl(sexid)
+                if not downloaded_file:
+                    print("API download returned None. Falling back to yt-dlp.")
+            except Exception as e:
+                print(f"API failed: {e}. Falling back to yt-dlp.")
+            if not downloaded_file:
+                downloaded_file = await loop.run_in_executor(None, audio_dl)
         return downloaded_file, direct
@@ -24,8 +24,9 @@ async def sg(client: Client, message: Message):
             return await lol.edit("<code>Please specify a valid user!</code>")
     bo = ["sangmata_bot", "sangmata_beta_bot"]
     sg = random.choice(bo)
-    if 1 in assistants:
-        ubot = us.one
+    if not assistants:
+        return await lol.edit("<code>No assistant is running!</code>")
+    ubot = us.get(assistants[0])
     
     try:
         a = await ubot.send_message(sg, f"{user.id}")
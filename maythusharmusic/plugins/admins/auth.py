@@ -3,6 +3,7 @@ from pyrogram.types import Message
 
 from maythusharmusic import app
 from maythusharmusic.utils import extract_user, int_to_alpha
+from maythusharmusic.utils.admincache import add_admin, remove_admin
 from maythusharmusic.utils.database import (
     delete_authuser,
     get_authuser,
@@ -11,7 +12,7 @@ from maythusharmusic.utils.database import (
 )
 from maythusharmusic.utils.decorators import AdminActual, language
 from maythusharmusic.utils.inline import close_markup
-from config import BANNED_USERS, adminlist
+from config import BANNED_USERS
 
 
 @app.on_message(filters.command("auth") & filters.group & ~BANNED_USERS)
@@ -33,10 +34,7 @@ async def auth(client, message: Message, _):
             "admin_id": message.from_user.id,
             "admin_name": message.from_user.first_name,
         }
-        get = adminlist.get(message.chat.id)
-        if get:
-            if user.id not in get:
-                get.append(user.id)
+        add_admin(message.chat.id, user.id)
         await save_authuser(message.chat.id, token, assis)
         return await message.reply_text(_["auth_2"].format(user.mention))
     else:
@@ -52,10 +50,7 @@ async def unauthusers(client, message: Message, _):
     user = await extract_user(message)
     token = await int_to_alpha(user.id)
     deleted = await delete_authuser(message.chat.id, token)
-    get = adminlist.get(message.chat.id)
-    if get:
-        if user.id in get:
-            get.remove(user.id)
+    remove_admin(message.chat.id, user.id)
     if deleted:
         return await message.reply_text(_["auth_4"].format(user.mention))
     else:
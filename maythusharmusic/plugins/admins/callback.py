@@ -6,6 +6,7 @@ from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 from maythusharmusic import YouTube, app
 from maythusharmusic.core.call import Hotty
 from maythusharmusic.misc import SUDOERS, db
+from maythusharmusic.utils.admincache import get_admins
 from maythusharmusic.utils.database import (
     get_active_chats,
     get_lang,
@@ -21,7 +22,10 @@ from maythusharmusic.utils.decorators.language import languageCB
 from maythusharmusic.utils.formatters import seconds_to_min
 from maythusharmusic.utils.inline import close_markup, stream_markup, stream_markup_timer
 from maythusharmusic.utils.stream.autoclear import auto_clean
-from maythusharmusic.utils.thumbnails import get_thumb
+from maythusharmusic.utils.stream.clock import position, start_clock
+from maythusharmusic.utils.stream.prefetch import get_prefetched, prefetch
+from maythusharmusic.utils.stream.progress import progress_updater
+from maythusharmusic.utils.thumbnails import send_thumb
 from config import (
     BANNED_USERS,
     SUPPORT_CHAT,
@@ -29,13 +33,11 @@ from config import (
     STREAM_IMG_URL,
     TELEGRAM_AUDIO_URL,
     TELEGRAM_VIDEO_URL,
-    adminlist,
     confirmer,
     votemode,
 )
 from strings import get_string
 
-checker = {}
 upvoters = {}
 
 
@@ -123,7 +125,7 @@ async def del_back_playlist(client, CallbackQuery, _):
         is_non_admin = await is_nonadmin_chat(CallbackQuery.message.chat.id)
         if not is_non_admin:
             if CallbackQuery.from_user.id not in SUDOERS:
-                admins = adminlist.get(CallbackQuery.message.chat.id)
+                admins = await get_admins(CallbackQuery.message.chat.id)
                 if not admins:
                     return await CallbackQuery.answer(_["admin_13"], show_alert=True)
                 else:
@@ -198,13 +200,14 @@ async def del_back_playlist(client, CallbackQuery, _):
             txt = f"➻ sᴛʀᴇᴀᴍ ʀᴇ-ᴘʟᴀʏᴇᴅ 🎄\n│ \n└ʙʏ : {mention} 🥀"
         await CallbackQuery.answer()
         queued = check[0]["file"]
+        prefetch(chat_id)
         title = (check[0]["title"]).title()
         user = check[0]["by"]
         duration = check[0]["dur"]
         streamtype = check[0]["streamtype"]
         videoid = check[0]["vidid"]
         status = True if str(streamtype) == "video" else None
-        db[chat_id][0]["played"] = 0
+        start_clock(chat_id)
         exis = (check[0]).get("old_dur")
         if exis:
             db[chat_id][0]["dur"] = exis
@@ -227,9 +230,9 @@ async def del_back_playlist(client, CallbackQuery, _):
             except:
                 return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
-                photo=img,
+            run = await send_thumb(
+                videoid,
+                CallbackQuery.message.reply_photo,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
                     title[:23],
@@ -242,18 +245,23 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["markup"] = "tg"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
         elif "vid_" in queued:
-            mystic = await CallbackQuery.message.reply_text(
-                _["call_7"], disable_web_page_preview=True
-            )
-            try:
-                file_path, direct = await YouTube.download(
-                    videoid,
-                    mystic,
-                    videoid=True,
-                    video=status,
+            mystic = None
+            file_path = get_prefetched(check[0])
+            if not file_path:
+                mystic = await CallbackQuery.message.reply_text(
+                    _["call_7"], disable_web_page_preview=True
                 )
-            except:
-                return await mystic.edit_text(_["call_6"])
+                try:
+                    file_path, direct = await YouTube.download(
+                        videoid,
+                        mystic,
+                        videoid=True,
+                        video=status,
+                    )
+                except:
+                    return await mystic.edit_text(_["call_6"])
+            # The queue keeps vid_, remember what is actually playing
+            check[0]["downloaded"] = file_path
             try:
                 image = await YouTube.thumbnail(videoid, True)
             except:
@@ -261,11 +269,13 @@ async def del_back_playlist(client, CallbackQuery, _):
             try:
                 await Hotty.skip_stream(chat_id, file_path, video=status, image=image)
             except:
-                return await mystic.edit_text(_["call_6"])
+                if mystic:
+                    return await mystic.edit_text(_["call_6"])
+                return await CallbackQuery.message.reply_text(_["call_6"])
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
-            run = await CallbackQuery.message.reply_photo(
-                photo=img,
+            run = await send_thumb(
+                videoid,
+                CallbackQuery.message.reply_photo,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
                     title[:23],
@@ -277,7 +287,8 @@ async def del_back_playlist(client, CallbackQuery, _):
             db[chat_id][0]["mystic"] = run
             db[chat_id][0]["markup"] = "stream"
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
-            await mystic.delete()
+            if mystic:
+                await mystic.delete()
         elif "index_" in queued:
             try:
                 await Hotty.skip_stream(chat_id, videoid, video=status)
@@ -334,9 +345,9 @@ async def del_back_playlist(client, CallbackQuery, _):
                 db[chat_id][0]["markup"] = "tg"
             else:
                 button = stream_markup(_, chat_id)
-                img = await get_thumb(videoid)
-                run = await CallbackQuery.message.reply_photo(
-                    photo=img,
+                run = await send_thumb(
+                    videoid,
+                    CallbackQuery.message.reply_photo,
                     caption=_["stream_1"].format(
                         f"https://t.me/{app.username}?start=info_{videoid}",
                         title[:23],
@@ -350,48 +361,4 @@ async def del_back_playlist(client, CallbackQuery, _):
             await CallbackQuery.edit_message_text(txt, reply_markup=close_markup(_))
 
 
-async def markup_timer():
-    while not await asyncio.sleep(7):
-        active_chats = await get_active_chats()
-        for chat_id in active_chats:
-            try:
-                if not await is_music_playing(chat_id):
-                    continue
-                playing = db.get(chat_id)
-                if not playing:
-                    continue
-                duration_seconds = int(playing[0]["seconds"])
-                if duration_seconds == 0:
-                    continue
-                try:
-                    mystic = playing[0]["mystic"]
-                except:
-                    continue
-                try:
-                    check = checker[chat_id][mystic.id]
-                    if check is False:
-                        continue
-                except:
-                    pass
-                try:
-                    language = await get_lang(chat_id)
-                    _ = get_string(language)
-                except:
-                    _ = get_string("en")
-                try:
-                    buttons = stream_markup_timer(
-                        _,
-                        chat_id,
-                        seconds_to_min(playing[0]["played"]),
-                        playing[0]["dur"],
-                    )
-                    await mystic.edit_reply_markup(
-                        reply_markup=InlineKeyboardMarkup(buttons)
-                    )
-                except:
-                    continue
-            except:
-                continue
-
-
-asyncio.create_task(markup_timer())
+asyncio.create_task(progress_updater())
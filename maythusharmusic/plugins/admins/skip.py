@@ -9,7 +9,9 @@ from maythusharmusic.utils.database import get_loop
 from maythusharmusic.utils.decorators import AdminRightsCheck
 from maythusharmusic.utils.inline import close_markup, stream_markup
 from maythusharmusic.utils.stream.autoclear import auto_clean
-from maythusharmusic.utils.thumbnails import get_thumb
+from maythusharmusic.utils.stream.clock import start_clock
+from maythusharmusic.utils.stream.prefetch import get_prefetched, prefetch
+from maythusharmusic.utils.thumbnails import send_thumb
 from config import BANNED_USERS
 
 
@@ -90,12 +92,13 @@ async def skip(cli, message: Message, _, chat_id):
             except:
                 return
     queued = check[0]["file"]
+    prefetch(chat_id)
     title = (check[0]["title"]).title()
     user = check[0]["by"]
     streamtype = check[0]["streamtype"]
     videoid = check[0]["vidid"]
     status = True if str(streamtype) == "video" else None
-    db[chat_id][0]["played"] = 0
+    start_clock(chat_id)
     exis = (check[0]).get("old_dur")
     if exis:
         db[chat_id][0]["dur"] = exis
@@ -115,9 +118,9 @@ async def skip(cli, message: Message, _, chat_id):
         except:
             return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        img = await get_thumb(videoid)
-        run = await message.reply_photo(
-            photo=img,
+        run = await send_thumb(
+            videoid,
+            message.reply_photo,
             caption=_["stream_1"].format(
                 f"https://t.me/{app.username}?start=info_{videoid}",
                 title[:23],
@@ -129,16 +132,23 @@ async def skip(cli, message: Message, _, chat_id):
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "tg"
     elif "vid_" in queued:
-        mystic = await message.reply_text(_["call_7"], disable_web_page_preview=True)
-        try:
-            file_path, direct = await YouTube.download(
-                videoid,
-                mystic,
-                videoid=True,
-                video=status,
+        mystic = None
+        file_path = get_prefetched(check[0])
+        if not file_path:
+            mystic = await message.reply_text(
+                _["call_7"], disable_web_page_preview=True
             )
-        except:
-            return await mystic.edit_text(_["call_6"])
+            try:
+                file_path, direct = await YouTube.download(
+                    videoid,
+                    mystic,
+                    videoid=True,
+                    video=status,
+                )
+            except:
+                return await mystic.edit_text(_["call_6"])
+        # The queue keeps vid_, remember what is actually playing
+        check[0]["downloaded"] = file_path
         try:
             image = await YouTube.thumbnail(videoid, True)
         except:
@@ -146,11 +156,13 @@ async def skip(cli, message: Message, _, chat_id):
         try:
             await Hotty.skip_stream(chat_id, file_path, video=status, image=image)
         except:
-            return await mystic.edit_text(_["call_6"])
+            if mystic:
+                return await mystic.edit_text(_["call_6"])
+            return await message.reply_text(_["call_6"])
         button = stream_markup(_, chat_id)
-        img = await get_thumb(videoid)
-        run = await message.reply_photo(
-            photo=img,
+        run = await send_thumb(
+            videoid,
+            message.reply_photo,
             caption=_["stream_1"].format(
                 f"https://t.me/{app.username}?start=info_{videoid}",
                 title[:23],
@@ -161,7 +173,8 @@ async def skip(cli, message: Message, _, chat_id):
         )
         db[chat_id][0]["mystic"] = run
         db[chat_id][0]["markup"] = "stream"
-        await mystic.delete()
+        if mystic:
+            await mystic.delete()
     elif "index_" in queued:
         try:
             await Hotty.skip_stream(chat_id, videoid, video=status)
@@ -217,9 +230,9 @@ async def skip(cli, message: Message, _, chat_id):
             db[chat_id][0]["markup"] = "tg"
         else:
             button = stream_markup(_, chat_id)
-            img = await get_thumb(videoid)
-            run = await message.reply_photo(
-                photo=img,
+            run = await send_thumb(
+                videoid,
+                message.reply_photo,
                 caption=_["stream_1"].format(
                     f"https://t.me/{app.username}?start=info_{videoid}",
                     title[:23],
@@ -4,7 +4,7 @@ from pyrogram import filters
 from pyrogram.types import Message
 from maythusharmusic import app
 from maythusharmusic.mongo.readable_time import get_readable_time
-from maythusharmusic.mongo.afkdb import add_afk, is_afk, remove_afk
+from maythusharmusic.mongo.afkdb import add_afk, anyone_afk, is_afk, remove_afk
 
 
 @app.on_message(filters.command(["afk", "brb"], prefixes=["/", "!"]))
@@ -167,6 +167,9 @@ chat_watcher_group = 1
 async def chat_watcher_func(_, message):
     if message.sender_chat:
         return
+    # Nobody is afk most of the time, so there is nothing to look up or reply to
+    if not await anyone_afk():
+        return
     userid = message.from_user.id
     user_name = message.from_user.first_name
     if message.entities:
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import re
 import yt_dlp
@@ -18,6 +19,12 @@ from config import (
 )
 from maythusharmusic import YouTube, app
 from maythusharmusic.utils.decorators.language import language, languageCB
+from maythusharmusic.utils.fileids import (
+    STALE_ERRORS,
+    forget_file_id,
+    get_file_id,
+    save_file_id,
+)
 from maythusharmusic.utils.formatters import convert_bytes
 from maythusharmusic.utils.inline.song import song_markup
 
@@ -193,6 +200,11 @@ async def song_helper_cb(client, callback_query: CallbackQuery, _):
 
 # Downloading Songs Here
 
+def song_info(url: str) -> dict:
+    with yt_dlp.YoutubeDL({"quiet": True}) as ytdl:
+        return ytdl.extract_info(url, download=False)
+
+
 @app.on_callback_query(
     filters.regex(pattern=r"song_download") & ~BANNED_USERS
 )
@@ -207,8 +219,22 @@ async def song_download_cb(client, callback_query: CallbackQuery, _) :
     stype, format_id, vidid = callback_request.split("|")
     mystic = await callback_query.edit_message_text(_["song_8"])
     yturl = f"https://www.youtube.com/watch?v={vidid}"
-    with yt_dlp.YoutubeDL({"quiet": True}) as ytdl:
-        x = ytdl.extract_info(yturl, download=False)
+    key = f"song:{vidid}:{stype}:{format_id}"
+    file_id = await get_file_id(key)
+    if file_id:
+        # Already uploaded, the cached metadata has all that's left to send
+        title = re.sub("\W+", " ", (await YouTube.title(vidid, True)).title())
+        if stype == "video":
+            med = InputMediaVideo(
+                media=file_id, caption=title, supports_streaming=True
+            )
+        else:
+            med = InputMediaAudio(media=file_id, caption=title)
+        try:
+            return await callback_query.edit_message_media(media=med)
+        except STALE_ERRORS:
+            forget_file_id(key)
+    x = await asyncio.get_running_loop().run_in_executor(None, song_info, yturl)
     title = (x["title"]).title()
     title = re.sub("\W+", " ", title)
     thumb_image_path = await callback_query.message.download()
@@ -242,10 +268,11 @@ async def song_download_cb(client, callback_query: CallbackQuery, _) :
             action="upload_video",
         )
         try:
-            await callback_query.edit_message_media(media=med)
+            sent = await callback_query.edit_message_media(media=med)
         except Exception as e:
             print(e)
             return await mystic.edit_text(_["song_10"])
+        save_file_id(key, sent)
         os.remove(file_path)
     elif stype == "audio":
         try:
@@ -271,8 +298,9 @@ async def song_download_cb(client, callback_query: CallbackQuery, _) :
             action="upload_audio",
         )
         try:
-            await callback_query.edit_message_media(media=med)
+            sent = await callback_query.edit_message_media(media=med)
         except Exception as e:
             print(e)
             return await mystic.edit_text(_["song_10"])
+        save_file_id(key, sent)
         os.remove(filename)
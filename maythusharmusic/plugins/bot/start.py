@@ -3,7 +3,6 @@ import asyncio
 from pyrogram import filters
 from pyrogram.enums import ChatType
 from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
-from youtubesearchpython.__future__ import VideosSearch
 
 import config
 from maythusharmusic import app
@@ -19,6 +18,7 @@ from maythusharmusic.utils.database import (
 )
 from maythusharmusic.utils.decorators.language import LanguageStart
 from maythusharmusic.utils.formatters import get_readable_time
+from maythusharmusic.utils.metadata import get_meta
 from maythusharmusic.utils.inline import help_pannel, private_panel, start_panel
 from config import BANNED_USERS
 from strings import get_string
@@ -50,18 +50,17 @@ async def start_pm(client, message: Message, _):
             m = await message.reply_sticker("CAACAgUAAxkBAAEObxloHODEbJMRLG0DgnPYJ7bOUXc5QwACmRkAAg6V6FSBJlu8dUgdCTYE")
             query = (str(name)).replace("info_", "", 1)
             query = f"https://www.youtube.com/watch?v={query}"
-            results = VideosSearch(query, limit=1)
-            for result in (await results.next())["result"]:
-                title = result["title"]
-                duration = result["duration"]
-                views = result["viewCount"]["short"]
-                thumbnail = result["thumbnails"][0]["url"].split("?")[0]
-                channellink = result["channel"]["link"]
-                channel = result["channel"]["name"]
-                link = result["link"]
-                published = result["publishedTime"]
+            meta = await get_meta(query)
+            link = meta.link
+            thumbnail = meta.thumbnail
             searched_text = _["start_6"].format(
-                title, duration, views, published, channellink, channel, app.mention
+                meta.title,
+                meta.duration,
+                meta.views,
+                meta.published,
+                meta.channel_link,
+                meta.channel,
+                app.mention,
             )
             key = InlineKeyboardMarkup(
                 [
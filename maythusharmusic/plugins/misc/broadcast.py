@@ -1,29 +1,93 @@
 import asyncio
 
 from pyrogram import filters
-from pyrogram.enums import ChatMembersFilter
 from pyrogram.errors import FloodWait
 
 from maythusharmusic import app
 from maythusharmusic.misc import SUDOERS
 from maythusharmusic.utils.database import (
-    get_active_chats,
-    get_authuser_names,
+    count_served_chats,
+    count_served_users,
     get_client,
-    get_served_chats,
-    get_served_users,
+    get_lang,
+    iter_served_chats,
+    iter_served_users,
 )
 from maythusharmusic.utils.decorators.language import language
-from maythusharmusic.utils.formatters import alpha_to_int
-from config import adminlist
+from maythusharmusic.utils.jobs import limiter, register, start_job
+from strings import get_string
 
-IS_BROADCASTING = False
+async def _send(params: dict, chat_id: int):
+    if params["message_id"]:
+        return await app.forward_messages(
+            chat_id, params["from_chat"], params["message_id"]
+        )
+    return await app.send_message(chat_id, text=params["text"])
+
+
+async def _deliver_user(params: dict, user_id: int):
+    await _send(params, user_id)
+
+
+async def _deliver(params: dict, chat_id: int):
+    m = await _send(params, chat_id)
+    # -pin only applies to served chats, never to users' private chats
+    if params["pin"]:
+        await limiter.acquire()
+        try:
+            await m.pin(disable_notification=not params["loud"])
+            return "pinned"
+        except:
+            pass
+
+
+async def _count_chats(params: dict) -> int:
+    return await count_served_chats()
+
+
+async def _count_users(params: dict) -> int:
+    return await count_served_users()
+
+
+async def _chats_done(job):
+    _ = get_string(job.params["lang"])
+    try:
+        await app.send_message(
+            job.chat_id,
+            _["broad_3"].format(job.stats["ok"], job.stats.get("pinned", 0)),
+        )
+    except:
+        pass
+
+
+async def _users_done(job):
+    _ = get_string(job.params["lang"])
+    try:
+        await app.send_message(job.chat_id, _["broad_4"].format(job.stats["ok"]))
+    except:
+        pass
+
+
+register(
+    "broadcast",
+    lambda params, after: iter_served_chats(after),
+    _deliver,
+    _count_chats,
+    finish=_chats_done,
+)
+register(
+    "broadcast_users",
+    lambda params, after: iter_served_users(after),
+    _deliver_user,
+    _count_users,
+    finish=_users_done,
+)
 
 
 @app.on_message(filters.command("broadcast") & SUDOERS)
 @language
 async def braodcast_message(client, message, _):
-    global IS_BROADCASTING
+    x = y = query = None
     if message.reply_to_message:
         x = message.reply_to_message.id
         y = message.chat.id
@@ -44,80 +108,26 @@ async def braodcast_message(client, message, _):
         if query == "":
             return await message.reply_text(_["broad_8"])
 
-    IS_BROADCASTING = True
-    await message.reply_text(_["broad_1"])
-
+    params = {
+        "from_chat": y,
+        "message_id": x,
+        "text": query,
+        "pin": "-pin" in message.text,
+        "loud": "-pinloud" in message.text,
+        "lang": await get_lang(message.chat.id),
+    }
     if "-nobot" not in message.text:
-        sent = 0
-        pin = 0
-        chats = []
-        schats = await get_served_chats()
-        for chat in schats:
-            chats.append(int(chat["chat_id"]))
-        for i in chats:
-            try:
-                m = (
-                    await app.forward_messages(i, y, x)
-                    if message.reply_to_message
-                    else await app.send_message(i, text=query)
-                )
-                if "-pin" in message.text:
-                    try:
-                        await m.pin(disable_notification=True)
-                        pin += 1
-                    except:
-                        continue
-                elif "-pinloud" in message.text:
-                    try:
-                        await m.pin(disable_notification=False)
-                        pin += 1
-                    except:
-                        continue
-                sent += 1
-                await asyncio.sleep(0.2)
-            except FloodWait as fw:
-                flood_time = int(fw.value)
-                if flood_time > 200:
-                    continue
-                await asyncio.sleep(flood_time)
-            except:
-                continue
-        try:
-            await message.reply_text(_["broad_3"].format(sent, pin))
-        except:
-            pass
+        mystic = await message.reply_text(_["broad_1"])
+        await start_job("broadcast", params, message.chat.id, mystic.id)
 
     if "-user" in message.text:
-        susr = 0
-        served_users = []
-        susers = await get_served_users()
-        for user in susers:
-            served_users.append(int(user["user_id"]))
-        for i in served_users:
-            try:
-                m = (
-                    await app.forward_messages(i, y, x)
-                    if message.reply_to_message
-                    else await app.send_message(i, text=query)
-                )
-                susr += 1
-                await asyncio.sleep(0.2)
-            except FloodWait as fw:
-                flood_time = int(fw.value)
-                if flood_time > 200:
-                    continue
-                await asyncio.sleep(flood_time)
-            except:
-                pass
-        try:
-            await message.reply_text(_["broad_4"].format(susr))
-        except:
-            pass
+        mystic = await message.reply_text(_["broad_1"])
+        await start_job("broadcast_users", params, message.chat.id, mystic.id)
 
     if "-assistant" in message.text:
         aw = await message.reply_text(_["broad_5"])
         text = _["broad_6"]
-        from AnonXMusic.core.userbot import assistants
+        from maythusharmusic.core.userbot import assistants
 
         for num in assistants:
             sent = 0
@@ -143,27 +153,3 @@ async def braodcast_message(client, message, _):
             await aw.edit_text(text)
         except:
             pass
-    IS_BROADCASTING = False
-
-
-async def auto_clean():
-    while not await asyncio.sleep(10):
-        try:
-            served_chats = await get_active_chats()
-            for chat_id in served_chats:
-                if chat_id not in adminlist:
-                    adminlist[chat_id] = []
-                    async for user in app.get_chat_members(
-                        chat_id, filter=ChatMembersFilter.ADMINISTRATORS
-                    ):
-                        if user.privileges.can_manage_video_chats:
-                            adminlist[chat_id].append(user.user.id)
-                    authusers = await get_authuser_names(chat_id)
-                    for user in authusers:
-                        user_id = await alpha_to_int(user)
-                        adminlist[chat_id].append(user_id)
-        except:
-            continue
-
-
-asyncio.create_task(auto_clean())
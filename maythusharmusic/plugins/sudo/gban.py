@@ -1,23 +1,89 @@
-import asyncio
-
 from pyrogram import filters
-from pyrogram.errors import FloodWait
 from pyrogram.types import Message
 
+import config
 from maythusharmusic import app
 from maythusharmusic.misc import SUDOERS
 from maythusharmusic.utils import get_readable_time
 from maythusharmusic.utils.database import (
     add_banned_user,
+    count_served_chats,
     get_banned_count,
     get_banned_users,
-    get_served_chats,
+    get_lang,
     is_banned_user,
+    iter_served_chats,
     remove_banned_user,
 )
 from maythusharmusic.utils.decorators.language import language
 from maythusharmusic.utils.extraction import extract_user
+from maythusharmusic.utils.jobs import register, start_job
 from config import BANNED_USERS
+from strings import get_string
+
+
+async def _ban(params: dict, chat_id: int):
+    await app.ban_chat_member(chat_id, params["user_id"])
+
+
+async def _unban(params: dict, chat_id: int):
+    await app.unban_chat_member(chat_id, params["user_id"])
+
+
+async def _count_chats(params: dict) -> int:
+    return await count_served_chats()
+
+
+async def _gban_done(job):
+    _ = get_string(job.params["lang"])
+    p = job.params
+    try:
+        await app.send_message(
+            job.chat_id,
+            _["gban_6"].format(
+                app.mention,
+                p["chat_title"],
+                job.chat_id,
+                p["mention"],
+                p["user_id"],
+                p["by"],
+                job.stats["ok"],
+            ),
+        )
+    except:
+        pass
+
+
+async def _ungban_done(job):
+    _ = get_string(job.params["lang"])
+    try:
+        await app.send_message(
+            job.chat_id, _["gban_9"].format(job.params["mention"], job.stats["ok"])
+        )
+    except:
+        pass
+
+
+register(
+    "gban",
+    lambda params, after: iter_served_chats(after),
+    _ban,
+    _count_chats,
+    finish=_gban_done,
+    record=True,
+)
+register(
+    "ungban",
+    lambda params, after: iter_served_chats(after),
+    _unban,
+    _count_chats,
+    finish=_ungban_done,
+    record=True,
+)
+
+
+def _expected(chats: int) -> str:
+    return get_readable_time(int(chats / config.TG_RATE_LIMIT)) or "0s"
 
 
 @app.on_message(filters.command(["gban", "globalban"]) & SUDOERS)
@@ -38,34 +104,21 @@ async def global_ban(client, message: Message, _):
         return await message.reply_text(_["gban_4"].format(user.mention))
     if user.id not in BANNED_USERS:
         BANNED_USERS.add(user.id)
-    served_chats = []
-    chats = await get_served_chats()
-    for chat in chats:
-        served_chats.append(int(chat["chat_id"]))
-    time_expected = get_readable_time(len(served_chats))
-    mystic = await message.reply_text(_["gban_5"].format(user.mention, time_expected))
-    number_of_chats = 0
-    for chat_id in served_chats:
-        try:
-            await app.ban_chat_member(chat_id, user.id)
-            number_of_chats += 1
-        except FloodWait as fw:
-            await asyncio.sleep(int(fw.value))
-        except:
-            continue
     await add_banned_user(user.id)
-    await message.reply_text(
-        _["gban_6"].format(
-            app.mention,
-            message.chat.title,
-            message.chat.id,
-            user.mention,
-            user.id,
-            message.from_user.mention,
-            number_of_chats,
-        )
+    time_expected = _expected(await count_served_chats())
+    mystic = await message.reply_text(_["gban_5"].format(user.mention, time_expected))
+    await start_job(
+        "gban",
+        {
+            "user_id": user.id,
+            "mention": user.mention,
+            "by": message.from_user.mention,
+            "chat_title": message.chat.title,
+            "lang": await get_lang(message.chat.id),
+        },
+        message.chat.id,
+        mystic.id,
     )
-    await mystic.delete()
 
 
 @app.on_message(filters.command(["ungban"]) & SUDOERS)
@@ -80,24 +133,19 @@ async def global_un(client, message: Message, _):
         return await message.reply_text(_["gban_7"].format(user.mention))
     if user.id in BANNED_USERS:
         BANNED_USERS.remove(user.id)
-    served_chats = []
-    chats = await get_served_chats()
-    for chat in chats:
-        served_chats.append(int(chat["chat_id"]))
-    time_expected = get_readable_time(len(served_chats))
-    mystic = await message.reply_text(_["gban_8"].format(user.mention, time_expected))
-    number_of_chats = 0
-    for chat_id in served_chats:
-        try:
-            await app.unban_chat_member(chat_id, user.id)
-            number_of_chats += 1
-        except FloodWait as fw:
-            await asyncio.sleep(int(fw.value))
-        except:
-            continue
     await remove_banned_user(user.id)
-    await message.reply_text(_["gban_9"].format(user.mention, number_of_chats))
-    await mystic.delete()
+    time_expected = _expected(await count_served_chats())
+    mystic = await message.reply_text(_["gban_8"].format(user.mention, time_expected))
+    await start_job(
+        "ungban",
+        {
+            "user_id": user.id,
+            "mention": user.mention,
+            "lang": await get_lang(message.chat.id),
+        },
+        message.chat.id,
+        mystic.id,
+    )
 
 
 @app.on_message(filters.command(["gbannedusers", "gbanlist"]) & SUDOERS)
@@ -0,0 +1,32 @@
+from pyrogram import filters
+from pyrogram.types import Message
+
+from maythusharmusic import app
+from maythusharmusic.misc import SUDOERS
+from maythusharmusic.utils.jobs import cancel_job, get_job, recent_jobs
+
+
+@app.on_message(filters.command(["jobs", "job"]) & SUDOERS)
+async def job_status(_, message: Message):
+    if len(message.command) == 2:
+        job = await get_job(message.command[1])
+        if not job:
+            return await message.reply_text("» ɴᴏ sᴜᴄʜ ᴊᴏʙ.")
+        jobs = [job]
+    else:
+        jobs = await recent_jobs()
+        if not jobs:
+            return await message.reply_text("» ɴᴏ ʙᴀᴄᴋɢʀᴏᴜɴᴅ ᴊᴏʙs ʏᴇᴛ.")
+    text = ""
+    for job in jobs:
+        text += f"<code>{job.id}</code> [{job.status}]\n{job.progress()}\n\n"
+    await message.reply_text(text)
+
+
+@app.on_message(filters.command(["canceljob"]) & SUDOERS)
+async def job_cancel(_, message: Message):
+    if len(message.command) != 2:
+        return await message.reply_text("<b>ᴇxᴀᴍᴘʟᴇ :</b>\n\n/canceljob [ᴊᴏʙ ɪᴅ]")
+    if await cancel_job(message.command[1]):
+        return await message.reply_text("» ᴊᴏʙ ᴄᴀɴᴄᴇʟʟᴇᴅ.")
+    await message.reply_text("» ɴᴏ sᴜᴄʜ ʀᴜɴɴɪɴɢ ᴊᴏʙ.")
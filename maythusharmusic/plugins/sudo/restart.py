@@ -19,6 +19,8 @@ from maythusharmusic.utils.database import (
 )
 from maythusharmusic.utils.decorators.language import language
 from maythusharmusic.utils.pastebin import HottyBin
+from maythusharmusic.utils.database.settings import flush_settings
+from maythusharmusic.utils.stream.store import flush_queues
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -106,6 +108,11 @@ async def update_(client, message, _):
             )
     else:
         os.system("pip3 install -r requirements.txt")
+        try:
+            await flush_queues()
+            await flush_settings()
+        except:
+            pass
         os.system(f"kill -9 {os.getpid()} && bash start")
         exit()
 
@@ -134,4 +141,9 @@ async def restart_(_, message):
     await response.edit_text(
         "» ʀᴇsᴛᴀʀᴛ ᴘʀᴏᴄᴇss sᴛᴀʀᴛᴇᴅ, ᴘʟᴇᴀsᴇ ᴡᴀɪᴛ ғᴏʀ ғᴇᴡ sᴇᴄᴏɴᴅs ᴜɴᴛɪʟ ᴛʜᴇ ʙᴏᴛ sᴛᴀʀᴛs..."
     )
+    try:
+        await flush_queues()
+        await flush_settings()
+    except:
+        pass
     os.system(f"kill -9 {os.getpid()} && bash start")
@@ -2,16 +2,16 @@ import asyncio
 import time
 
 from pyrogram import filters
-from pyrogram.enums import ChatMembersFilter
-from pyrogram.types import CallbackQuery, Message
+from pyrogram.types import CallbackQuery, ChatMemberUpdated, Message
 
 from maythusharmusic import app
 from maythusharmusic.core.call import Hotty
 from maythusharmusic.misc import db
-from maythusharmusic.utils.database import get_assistant, get_authuser_names, get_cmode
+from maythusharmusic.utils.admincache import invalidate_admins, is_admin_change, refresh_admins
+from maythusharmusic.utils.database import get_assistant, get_cmode
 from maythusharmusic.utils.decorators import ActualAdminCB, AdminActual, language
-from maythusharmusic.utils.formatters import alpha_to_int, get_readable_time
-from config import BANNED_USERS, adminlist, lyrical
+from maythusharmusic.utils.formatters import get_readable_time
+from config import BANNED_USERS, lyrical
 
 rel = {}
 
@@ -29,16 +29,7 @@ async def reload_admin_cache(client, message: Message, _):
             if saved > time.time():
                 left = get_readable_time((int(saved) - int(time.time())))
                 return await message.reply_text(_["reload_1"].format(left))
-        adminlist[message.chat.id] = []
-        async for user in app.get_chat_members(
-            message.chat.id, filter=ChatMembersFilter.ADMINISTRATORS
-        ):
-            if user.privileges.can_manage_video_chats:
-                adminlist[message.chat.id].append(user.user.id)
-        authusers = await get_authuser_names(message.chat.id)
-        for user in authusers:
-            user_id = await alpha_to_int(user)
-            adminlist[message.chat.id].append(user_id)
+        await refresh_admins(message.chat.id)
         now = int(time.time()) + 180
         rel[message.chat.id] = now
         await message.reply_text(_["reload_2"])
@@ -121,3 +112,9 @@ async def stop_download(client, CallbackQuery: CallbackQuery, _):
         except:
             return await CallbackQuery.answer(_["tg_8"], show_alert=True)
     await CallbackQuery.answer(_["tg_9"], show_alert=True)
+
+
+@app.on_chat_member_updated(filters.group, group=-1)
+async def admin_changed(client, update: ChatMemberUpdated):
+    if is_admin_change(update):
+        invalidate_admins(update.chat.id)
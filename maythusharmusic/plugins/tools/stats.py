@@ -13,8 +13,11 @@ from maythusharmusic import app
 from maythusharmusic.core.userbot import assistants
 from maythusharmusic.misc import SUDOERS, mongodb
 from maythusharmusic.plugins import ALL_MODULES
-from maythusharmusic.utils.database import get_served_chats, get_served_users, get_sudoers, get_queries
+from maythusharmusic.utils.database import count_served_chats, count_served_users, get_sudoers, get_queries
 from maythusharmusic.utils.decorators.language import language, languageCB
+from maythusharmusic.utils.formatters import convert_bytes
+from maythusharmusic.utils.stream.autoclear import cache_stats, cache_usage
+from maythusharmusic.utils.thumbnails import render_latency, thumb_stats
 from maythusharmusic.utils.inline.stats import back_stats_buttons, stats_buttons
 from config import BANNED_USERS
 
@@ -50,8 +53,8 @@ async def overall_stats(client, CallbackQuery, _):
     except:
         pass
     await CallbackQuery.edit_message_text(_["gstats_1"].format(app.mention))
-    served_chats = len(await get_served_chats())
-    served_users = len(await get_served_users())
+    served_chats = await count_served_chats()
+    served_users = await count_served_users()
     total_queries = await get_queries()
     text = _["gstats_3"].format(
         app.mention,
@@ -103,8 +106,8 @@ async def bot_stats(client, CallbackQuery, _):
     call = await mongodb.command("dbstats")
     datasize = call["dataSize"] / 1024
     storage = call["storageSize"] / 1024
-    served_chats = len(await get_served_chats())
-    served_users = len(await get_served_users())
+    served_chats = await count_served_chats()
+    served_users = await count_served_users()
     text = _["gstats_5"].format(
         app.mention,
         len(ALL_MODULES),
@@ -127,6 +130,11 @@ async def bot_stats(client, CallbackQuery, _):
         storage,
         call["collections"],
         call["objects"],
+        convert_bytes(cache_usage()) or "0 B",
+        cache_stats["hits"],
+        cache_stats["misses"],
+        thumb_stats["queued"],
+        render_latency(),
     )
     med = InputMediaPhoto(media=config.STATS_IMG_URL, caption=text)
     try:
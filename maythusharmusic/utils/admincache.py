@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from pyrogram.enums import ChatMembersFilter, ChatMemberStatus
+
+import config
+from maythusharmusic import LOGGER, app
+from maythusharmusic.utils.database import get_authuser_names
+from maythusharmusic.utils.formatters import alpha_to_int
+
+# chat_id -> (expires at, ids of admins who can manage video chats and auth users)
+_admins = {}
+_inflight = {}
+
+ADMIN_STATUSES = (ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER)
+
+
+async def _fetch(chat_id: int) -> set:
+    admins = set()
+    async for member in app.get_chat_members(
+        chat_id, filter=ChatMembersFilter.ADMINISTRATORS
+    ):
+        if member.privileges and member.privileges.can_manage_video_chats:
+            admins.add(member.user.id)
+    for user in await get_authuser_names(chat_id):
+        admins.add(await alpha_to_int(user))
+    _admins[chat_id] = (time.monotonic() + config.ADMIN_CACHE_TTL, admins)
+    return admins
+
+
+async def refresh_admins(chat_id: int) -> set:
+    # Many commands in the same chat share one fetch
+    task = _inflight.get(chat_id)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(chat_id))
+        _inflight[chat_id] = task
+        task.add_done_callback(lambda _: _inflight.pop(chat_id, None))
+    return await asyncio.shield(task)
+
+
+async def get_admins(chat_id: int) -> set:
+    cached = _admins.get(chat_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    try:
+        return await refresh_admins(chat_id)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Failed to fetch admins of {chat_id}: {e}")
+        return cached[1] if cached else set()
+
+
+def invalidate_admins(chat_id: int):
+    _admins.pop(chat_id, None)
+
+
+def add_admin(chat_id: int, user_id: int):
+    cached = _admins.get(chat_id)
+    if cached:
+        cached[1].add(user_id)
+
+
+def remove_admin(chat_id: int, user_id: int):
+    cached = _admins.get(chat_id)
+    if cached:
+        cached[1].discard(user_id)
+
+
+def is_admin_change(update) -> bool:
+    for member in (update.old_chat_member, update.new_chat_member):
+        if member and member.status in ADMIN_STATUSES:
+            return True
+    return False
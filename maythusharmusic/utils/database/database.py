@@ -1,8 +1,13 @@
 import random
-from typing import Dict, List, Union
+import time
+from collections import deque
+from typing import AsyncIterator, Dict, List, Union
 
-from maythusharmusic import userbot
+import config
+from maythusharmusic import LOGGER, userbot
 from maythusharmusic.core.mongo import mongodb, pymongodb
+from maythusharmusic.utils.database.settings import ChatFlag, ChatSetting, FlagSet
+from maythusharmusic.utils.stream.clock import pause_clock, resume_clock
 
 authdb = mongodb.adminauth
 authuserdb = mongodb.authuser
@@ -31,23 +36,29 @@ chatsdbc = mongodb.chatsc  # for clone
 usersdbc = mongodb.tgusersdbc  # for clone
 
 # Shifting to memory [mongo sucks often]
-active = []
-activevideo = []
+# chat_id -> {"assistant", "mode", "video", "started"} of chats in a voice chat
+active = {}
+activevideo = set()
 assistantdict = {}
+assistanterrors = {}
 autoend = {}
-count = {}
-channelconnect = {}
-langm = {}
+count = ChatSetting(countdb, "mode", 5)
+channelconnect = ChatSetting(channeldb, "mode", None)
+langm = ChatSetting(langdb, "lang", "my")
 loop = {}
-maintenance = []
-nonadmin = {}
+onoff = FlagSet(onoffdb, "on_off")
+autoends = FlagSet(autoenddb, "chat_id")
+nonadmin = ChatFlag(authdb, present=True)
 pause = {}
-playmode = {}
-playtype = {}
-skipmode = {}
+playmode = ChatSetting(playmodedb, "mode", "Direct")
+playtype = ChatSetting(playtypedb, "mode", "Everyone")
+skipmode = ChatFlag(skipdb, present=False)
 privatechats = {}
-cleanmode = []
-suggestion = {}
+# ids already known to be in usersdb / chatsdb
+servedusers = set()
+servedchats = set()
+cleanmode = set()
+suggestion = ChatFlag(suggdb, present=False)
 mute = {}
 audio = {}
 video = {}
@@ -169,16 +180,7 @@ async def get_assistant_number(chat_id: int) -> str:
 
 
 async def get_client(assistant: int):
-    if int(assistant) == 1:
-        return userbot.one
-    elif int(assistant) == 2:
-        return userbot.two
-    elif int(assistant) == 3:
-        return userbot.three
-    elif int(assistant) == 4:
-        return userbot.four
-    elif int(assistant) == 5:
-        return userbot.five
+    return userbot.get(assistant)
 
 
 async def set_assistant_new(chat_id, number):
@@ -190,10 +192,64 @@ async def set_assistant_new(chat_id, number):
     )
 
 
-async def set_assistant(chat_id):
+def assistant_load(assistant: int) -> int:
+    load = 0
+    for session in list(active.values()):
+        if session["assistant"] == assistant:
+            load += 3 if session["video"] else 1
+    return load
+
+
+def assistant_errors(assistant: int) -> int:
+    errors = assistanterrors.get(assistant)
+    if not errors:
+        return 0
+    window = time.time() - config.ASSISTANT_ERROR_WINDOW
+    while errors and errors[0] < window:
+        errors.popleft()
+    return len(errors)
+
+
+def is_assistant_healthy(assistant: int) -> bool:
+    return assistant_errors(assistant) < config.ASSISTANT_ERROR_LIMIT
+
+
+def pick_assistant(exclude: int = None) -> int:
     from maythusharmusic.core.userbot import assistants
 
-    ran_assistant = random.choice(assistants)
+    choices = [num for num in assistants if num != exclude] or assistants
+    healthy = [num for num in choices if is_assistant_healthy(num)] or choices
+    return min(
+        healthy,
+        key=lambda num: (assistant_load(num), assistant_errors(num), random.random()),
+    )
+
+
+async def assistant_failed(chat_id: int):
+    assistant = assistantdict.get(chat_id)
+    if not assistant:
+        return
+    if assistant not in assistanterrors:
+        assistanterrors[assistant] = deque()
+    assistanterrors[assistant].append(time.time())
+    if is_assistant_healthy(assistant):
+        return
+    for idle_chat in [
+        chat for chat, num in assistantdict.items() if num == assistant
+    ]:
+        if idle_chat in active:
+            continue
+        new_assistant = pick_assistant(exclude=assistant)
+        assistantdict[idle_chat] = new_assistant
+        await assdb.update_one(
+            {"chat_id": idle_chat},
+            {"$set": {"assistant": new_assistant}},
+            upsert=True,
+        )
+
+
+async def set_assistant(chat_id):
+    ran_assistant = pick_assistant()
     assistantdict[chat_id] = ran_assistant
     await assdb.update_one(
         {"chat_id": chat_id},
@@ -205,7 +261,10 @@ async def set_assistant(chat_id):
 
 
 async def get_assistant(chat_id: int) -> str:
-    from maythusharmusic.core.userbot import assistants
+    from maythusharmusic.core.userbot import assistants, assistants_ready
+
+    # Commands that arrive during boot wait for the assistants to come up
+    await assistants_ready.wait()
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
@@ -232,9 +291,7 @@ async def get_assistant(chat_id: int) -> str:
 
 
 async def set_calls_assistant(chat_id):
-    from maythusharmusic.core.userbot import assistants
-
-    ran_assistant = random.choice(assistants)
+    ran_assistant = pick_assistant()
     assistantdict[chat_id] = ran_assistant
     await assdb.update_one(
         {"chat_id": chat_id},
@@ -245,7 +302,10 @@ async def set_calls_assistant(chat_id):
 
 
 async def group_assistant(self, chat_id: int) -> int:
-    from maythusharmusic.core.userbot import assistants
+    from maythusharmusic.core.userbot import assistants, assistants_ready
+
+    # Commands that arrive during boot wait for the assistants to come up
+    await assistants_ready.wait()
 
     assistant = assistantdict.get(chat_id)
     if not assistant:
@@ -264,78 +324,39 @@ async def group_assistant(self, chat_id: int) -> int:
             assis = assistant
         else:
             assis = await set_calls_assistant(chat_id)
-    if int(assis) == 1:
-        return self.one
-    elif int(assis) == 2:
-        return self.two
-    elif int(assis) == 3:
-        return self.three
-    elif int(assis) == 4:
-        return self.four
-    elif int(assis) == 5:
-        return self.five
+    return self.calls.get(int(assis))
 
 
 async def is_skipmode(chat_id: int) -> bool:
-    mode = skipmode.get(chat_id)
-    if not mode:
-        user = await skipdb.find_one({"chat_id": chat_id})
-        if not user:
-            skipmode[chat_id] = True
-            return True
-        skipmode[chat_id] = False
-        return False
-    return mode
+    return await skipmode.get(chat_id)
 
 
 async def skip_on(chat_id: int):
-    skipmode[chat_id] = True
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if user:
-        return await skipdb.delete_one({"chat_id": chat_id})
+    skipmode.set(chat_id, True)
 
 
 async def skip_off(chat_id: int):
-    skipmode[chat_id] = False
-    user = await skipdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await skipdb.insert_one({"chat_id": chat_id})
+    skipmode.set(chat_id, False)
 
 
 async def get_upvote_count(chat_id: int) -> int:
-    mode = count.get(chat_id)
-    if not mode:
-        mode = await countdb.find_one({"chat_id": chat_id})
-        if not mode:
-            return 5
-        count[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await count.get(chat_id)
 
 
 async def set_upvotes(chat_id: int, mode: int):
-    count[chat_id] = mode
-    await countdb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    count.set(chat_id, mode)
 
 
 async def is_autoend() -> bool:
-    chat_id = 1234
-    user = await autoenddb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await autoends.is_on(1234)
 
 
 async def autoend_on():
-    chat_id = 1234
-    await autoenddb.insert_one({"chat_id": chat_id})
+    await autoends.set(1234, True)
 
 
 async def autoend_off():
-    chat_id = 1234
-    await autoenddb.delete_one({"chat_id": chat_id})
+    await autoends.set(1234, False)
 
 
 async def get_loop(chat_id: int) -> int:
@@ -350,76 +371,35 @@ async def set_loop(chat_id: int, mode: int):
 
 
 async def get_cmode(chat_id: int) -> int:
-    mode = channelconnect.get(chat_id)
-    if not mode:
-        mode = await channeldb.find_one({"chat_id": chat_id})
-        if not mode:
-            return None
-        channelconnect[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await channelconnect.get(chat_id)
 
 
 async def set_cmode(chat_id: int, mode: int):
-    channelconnect[chat_id] = mode
-    await channeldb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    channelconnect.set(chat_id, mode)
 
 
 async def get_playtype(chat_id: int) -> str:
-    mode = playtype.get(chat_id)
-    if not mode:
-        mode = await playtypedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playtype[chat_id] = "Everyone"
-            return "Everyone"
-        playtype[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await playtype.get(chat_id)
 
 
 async def set_playtype(chat_id: int, mode: str):
-    playtype[chat_id] = mode
-    await playtypedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    playtype.set(chat_id, mode)
 
 
 async def get_playmode(chat_id: int) -> str:
-    mode = playmode.get(chat_id)
-    if not mode:
-        mode = await playmodedb.find_one({"chat_id": chat_id})
-        if not mode:
-            playmode[chat_id] = "Direct"
-            return "Direct"
-        playmode[chat_id] = mode["mode"]
-        return mode["mode"]
-    return mode
+    return await playmode.get(chat_id)
 
 
 async def set_playmode(chat_id: int, mode: str):
-    playmode[chat_id] = mode
-    await playmodedb.update_one(
-        {"chat_id": chat_id}, {"$set": {"mode": mode}}, upsert=True
-    )
+    playmode.set(chat_id, mode)
 
 
 async def get_lang(chat_id: int) -> str:
-    mode = langm.get(chat_id)
-    if not mode:
-        lang = await langdb.find_one({"chat_id": chat_id})
-        if not lang:
-            langm[chat_id] = "my"
-            return "my"
-        langm[chat_id] = lang["lang"]
-        return lang["lang"]
-    return mode
+    return await langm.get(chat_id)
 
 
 async def set_lang(chat_id: int, lang: str):
-    langm[chat_id] = lang
-    await langdb.update_one({"chat_id": chat_id}, {"$set": {"lang": lang}}, upsert=True)
+    langm.set(chat_id, lang)
 
 
 async def is_music_playing(chat_id: int) -> bool:
@@ -431,10 +411,12 @@ async def is_music_playing(chat_id: int) -> bool:
 
 async def music_on(chat_id: int):
     pause[chat_id] = True
+    resume_clock(chat_id)
 
 
 async def music_off(chat_id: int):
     pause[chat_id] = False
+    pause_clock(chat_id)
 
 
 # Muted
@@ -454,182 +436,227 @@ async def mute_off(chat_id: int):
 
 
 async def get_active_chats() -> list:
-    return active
+    return list(active)
+
+
+async def get_active_sessions() -> dict:
+    return {chat_id: dict(session) for chat_id, session in list(active.items())}
+
+
+async def get_active_session(chat_id: int) -> Union[dict, None]:
+    return active.get(chat_id)
 
 
 async def is_active_chat(chat_id: int) -> bool:
-    if chat_id not in active:
-        return False
-    else:
-        return True
+    return chat_id in active
 
 
 async def add_active_chat(chat_id: int):
     if chat_id not in active:
-        active.append(chat_id)
+        video = chat_id in activevideo
+        active[chat_id] = {
+            "assistant": assistantdict.get(chat_id),
+            "mode": "video" if video else "audio",
+            "video": video,
+            "started": time.time(),
+        }
 
 
 async def remove_active_chat(chat_id: int):
-    if chat_id in active:
-        active.remove(chat_id)
+    active.pop(chat_id, None)
 
 
 async def get_active_video_chats() -> list:
-    return activevideo
+    return list(activevideo)
 
 
 async def is_active_video_chat(chat_id: int) -> bool:
-    if chat_id not in activevideo:
-        return False
-    else:
-        return True
+    return chat_id in activevideo
 
 
 async def add_active_video_chat(chat_id: int):
-    if chat_id not in activevideo:
-        activevideo.append(chat_id)
+    activevideo.add(chat_id)
+    if chat_id in active:
+        active[chat_id]["mode"] = "video"
+        active[chat_id]["video"] = True
 
 
 async def remove_active_video_chat(chat_id: int):
-    if chat_id in activevideo:
-        activevideo.remove(chat_id)
+    activevideo.discard(chat_id)
+    if chat_id in active:
+        active[chat_id]["mode"] = "audio"
+        active[chat_id]["video"] = False
 
 
 async def check_nonadmin_chat(chat_id: int) -> bool:
-    user = await authdb.find_one({"chat_id": chat_id})
-    if not user:
-        return False
-    return True
+    return await nonadmin.get(chat_id)
 
 
 async def is_nonadmin_chat(chat_id: int) -> bool:
-    mode = nonadmin.get(chat_id)
-    if not mode:
-        user = await authdb.find_one({"chat_id": chat_id})
-        if not user:
-            nonadmin[chat_id] = False
-            return False
-        nonadmin[chat_id] = True
-        return True
-    return mode
+    return await nonadmin.get(chat_id)
 
 
 async def add_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = True
-    is_admin = await check_nonadmin_chat(chat_id)
-    if is_admin:
-        return
-    return await authdb.insert_one({"chat_id": chat_id})
+    nonadmin.set(chat_id, True)
 
 
 async def remove_nonadmin_chat(chat_id: int):
-    nonadmin[chat_id] = False
-    is_admin = await check_nonadmin_chat(chat_id)
-    if not is_admin:
-        return
-    return await authdb.delete_one({"chat_id": chat_id})
+    nonadmin.set(chat_id, False)
 
 
 async def is_on_off(on_off: int) -> bool:
-    onoff = await onoffdb.find_one({"on_off": on_off})
-    if not onoff:
-        return False
-    return True
+    return await onoff.is_on(on_off)
 
 
 async def add_on(on_off: int):
-    is_on = await is_on_off(on_off)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": on_off})
+    await onoff.set(on_off, True)
 
 
 async def add_off(on_off: int):
-    is_off = await is_on_off(on_off)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": on_off})
+    await onoff.set(on_off, False)
 
 
 async def is_maintenance():
-    if not maintenance:
-        get = await onoffdb.find_one({"on_off": 1})
-        if not get:
-            maintenance.clear()
-            maintenance.append(2)
-            return True
-        else:
-            maintenance.clear()
-            maintenance.append(1)
-            return False
-    else:
-        if 1 in maintenance:
-            return False
-        else:
-            return True
+    return not await onoff.is_on(1)
 
 
 async def maintenance_off():
-    maintenance.clear()
-    maintenance.append(2)
-    is_off = await is_on_off(1)
-    if not is_off:
-        return
-    return await onoffdb.delete_one({"on_off": 1})
+    await onoff.set(1, False)
 
 
 async def maintenance_on():
-    maintenance.clear()
-    maintenance.append(1)
-    is_on = await is_on_off(1)
-    if is_on:
-        return
-    return await onoffdb.insert_one({"on_off": 1})
+    await onoff.set(1, True)
+
+
+async def _duplicates(collection, key: str) -> list:
+    """Return the _ids of every document past the first one per key."""
+    extra = []
+    async for doc in collection.aggregate(
+        [
+            {"$group": {"_id": f"${key}", "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gt": 1}}},
+        ],
+        allowDiskUse=True,
+    ):
+        extra += doc["ids"][1:]
+    return extra
+
+
+async def _unique_index(collection, key: str):
+    try:
+        return await collection.create_index(key, unique=True)
+    except Exception as e:
+        LOGGER(__name__).warning(f"Unique index on {collection.name}.{key} failed: {e}")
+    extra = await _duplicates(collection, key)
+    if extra and config.DROP_DUPLICATE_IDS:
+        await collection.delete_many({"_id": {"$in": extra}})
+        LOGGER(__name__).info(f"Removed {len(extra)} duplicate {key}s from {collection.name}")
+        return await collection.create_index(key, unique=True)
+    if extra:
+        LOGGER(__name__).warning(
+            f"{collection.name} has {len(extra)} duplicate {key}s, using a plain index. "
+            "Set DROP_DUPLICATE_IDS to remove them at the next start."
+        )
+    return await collection.create_index(key)
+
+
+async def ensure_indexes():
+    # Each index on its own, so one failing doesn't leave the others missing
+    for collection, key, unique in (
+        (usersdb, "user_id", True),
+        (chatsdb, "chat_id", True),
+        (gbansdb, "user_id", False),
+        (blockeddb, "user_id", False),
+    ):
+        try:
+            if unique:
+                await _unique_index(collection, key)
+            else:
+                await collection.create_index(key)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to index {collection.name}.{key}: {e}")
 
 
 async def is_served_user(user_id: int) -> bool:
-    user = await usersdb.find_one({"user_id": user_id})
+    if user_id in servedusers:
+        return True
+    user = await usersdb.find_one({"user_id": user_id}, {"_id": 1})
     if not user:
         return False
+    servedusers.add(user_id)
     return True
 
 
 async def get_served_users() -> list:
     users_list = []
-    async for user in usersdb.find({"user_id": {"$gt": 0}}):
+    async for user in usersdb.find({"user_id": {"$gt": 0}}, {"_id": 0, "user_id": 1}):
         users_list.append(user)
     return users_list
 
 
+async def iter_served_users(after: int = None) -> AsyncIterator[int]:
+    query = {"$gt": max(0, after or 0)}
+    async for user in usersdb.find(
+        {"user_id": query}, {"_id": 0, "user_id": 1}
+    ).sort("user_id", 1):
+        yield int(user["user_id"])
+
+
+async def count_served_users() -> int:
+    return await usersdb.count_documents({"user_id": {"$gt": 0}})
+
+
 async def add_served_user(user_id: int):
-    is_served = await is_served_user(user_id)
-    if is_served:
+    if user_id in servedusers:
         return
-    return await usersdb.insert_one({"user_id": user_id})
+    await usersdb.update_one(
+        {"user_id": user_id}, {"$set": {"user_id": user_id}}, upsert=True
+    )
+    servedusers.add(user_id)
 
 
 async def get_served_chats() -> list:
     chats_list = []
-    async for chat in chatsdb.find({"chat_id": {"$lt": 0}}):
+    async for chat in chatsdb.find({"chat_id": {"$lt": 0}}, {"_id": 0, "chat_id": 1}):
         chats_list.append(chat)
     return chats_list
 
 
+async def iter_served_chats(after: int = None) -> AsyncIterator[int]:
+    query = {"$lt": 0}
+    if after is not None:
+        query["$gt"] = after
+    async for chat in chatsdb.find(
+        {"chat_id": query}, {"_id": 0, "chat_id": 1}
+    ).sort("chat_id", 1):
+        yield int(chat["chat_id"])
+
+
+async def count_served_chats() -> int:
+    return await chatsdb.count_documents({"chat_id": {"$lt": 0}})
+
+
 async def is_served_chat(chat_id: int) -> bool:
-    chat = await chatsdb.find_one({"chat_id": chat_id})
+    if chat_id in servedchats:
+        return True
+    chat = await chatsdb.find_one({"chat_id": chat_id}, {"_id": 1})
     if not chat:
         return False
+    servedchats.add(chat_id)
     return True
 
 
 async def add_served_chat(chat_id: int):
-    is_served = await is_served_chat(chat_id)
-    if is_served:
+    if chat_id in servedchats:
         return
-    return await chatsdb.insert_one({"chat_id": chat_id})
+    await chatsdb.update_one(
+        {"chat_id": chat_id}, {"$set": {"chat_id": chat_id}}, upsert=True
+    )
+    servedchats.add(chat_id)
 
 
 async def delete_served_chat(chat_id: int):
+    servedchats.discard(chat_id)
     await chatsdb.delete_one({"chat_id": chat_id})
 
 
@@ -764,9 +791,7 @@ async def get_banned_users() -> list:
 
 
 async def get_banned_count() -> int:
-    users = blockeddb.find({"user_id": {"$gt": 0}})
-    users = await users.to_list(length=100000)
-    return len(users)
+    return await blockeddb.count_documents({"user_id": {"$gt": 0}})
 
 
 async def is_banned_user(user_id: int) -> bool:
@@ -825,49 +850,28 @@ async def remove_private_chat(chat_id: int):
 
 
 async def is_suggestion(chat_id: int) -> bool:
-    mode = suggestion.get(chat_id)
-    if not mode:
-        user = await suggdb.find_one({"chat_id": chat_id})
-        if not user:
-            suggestion[chat_id] = True
-            return True
-        suggestion[chat_id] = False
-        return False
-    return mode
+    return await suggestion.get(chat_id)
 
 
 async def suggestion_on(chat_id: int):
-    suggestion[chat_id] = True
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if user:
-        return await suggdb.delete_one({"chat_id": chat_id})
+    suggestion.set(chat_id, True)
 
 
 async def suggestion_off(chat_id: int):
-    suggestion[chat_id] = False
-    user = await suggdb.find_one({"chat_id": chat_id})
-    if not user:
-        return await suggdb.insert_one({"chat_id": chat_id})
+    suggestion.set(chat_id, False)
 
 
 # Clean Mode
 async def is_cleanmode_on(chat_id: int) -> bool:
-    if chat_id not in cleanmode:
-        return True
-    else:
-        return False
+    return chat_id not in cleanmode
 
 
 async def cleanmode_off(chat_id: int):
-    if chat_id not in cleanmode:
-        cleanmode.append(chat_id)
+    cleanmode.add(chat_id)
 
 
 async def cleanmode_on(chat_id: int):
-    try:
-        cleanmode.remove(chat_id)
-    except:
-        pass
+    cleanmode.discard(chat_id)
 
 
 # Audio Video Limit
@@ -0,0 +1,161 @@
+import asyncio
+
+from pymongo import DeleteOne, UpdateOne
+
+import config
+from maythusharmusic.logging import LOGGER
+
+# Marks "not cached yet" so falsy values (False, None, 0) can be cached too
+MISSING = object()
+
+registry = []
+flags = []
+
+
+class ChatSetting:
+    """A per-chat value stored as {"chat_id": ..., <field>: value}.
+
+    Reads are served from memory, writes are coalesced per chat and
+    written back in one bulk_write by flush_settings().
+    """
+
+    def __init__(self, collection, field: str = "mode", default=None):
+        self.collection = collection
+        self.field = field
+        self.default = default
+        self.cache = {}
+        self.pending = {}
+        self.loaded = False
+        registry.append(self)
+
+    def _value(self, doc):
+        return doc[self.field] if doc else self.default
+
+    def _op(self, chat_id: int, value):
+        return UpdateOne(
+            {"chat_id": chat_id}, {"$set": {self.field: value}}, upsert=True
+        )
+
+    async def get(self, chat_id: int):
+        value = self.cache.get(chat_id, MISSING)
+        if value is MISSING:
+            if self.loaded:
+                value = self.default
+            else:
+                doc = await self.collection.find_one({"chat_id": chat_id})
+                value = self._value(doc)
+            self.cache[chat_id] = value
+        return value
+
+    def set(self, chat_id: int, value):
+        self.cache[chat_id] = value
+        self.pending[chat_id] = value
+
+    async def load(self):
+        async for doc in self.collection.find({}):
+            self.cache[doc["chat_id"]] = self._value(doc)
+        self.loaded = True
+
+    async def flush(self):
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        try:
+            await self.collection.bulk_write(
+                [self._op(chat_id, value) for chat_id, value in pending.items()],
+                ordered=False,
+            )
+        except Exception:
+            for chat_id, value in pending.items():
+                self.pending.setdefault(chat_id, value)
+            raise
+
+
+class ChatFlag(ChatSetting):
+    """A per-chat switch stored as the presence of a {"chat_id": ...} document."""
+
+    def __init__(self, collection, present: bool):
+        super().__init__(collection, default=not present)
+        self.present = present
+
+    def _value(self, doc):
+        return self.present if doc else self.default
+
+    def _op(self, chat_id: int, value):
+        if value == self.present:
+            return UpdateOne(
+                {"chat_id": chat_id}, {"$set": {"chat_id": chat_id}}, upsert=True
+            )
+        return DeleteOne({"chat_id": chat_id})
+
+
+class FlagSet:
+    """Bot-wide switches stored as one {<field>: key} document per enabled key.
+
+    Loaded once at boot and kept in memory; setters write through to mongo.
+    """
+
+    def __init__(self, collection, field: str):
+        self.collection = collection
+        self.field = field
+        self.enabled = set()
+        self.loaded = False
+        flags.append(self)
+
+    async def load(self):
+        enabled = set()
+        async for doc in self.collection.find({}):
+            enabled.add(doc.get(self.field))
+        self.enabled = enabled
+        self.loaded = True
+
+    async def is_on(self, key) -> bool:
+        if not self.loaded:
+            await self.load()
+        return key in self.enabled
+
+    async def set(self, key, on: bool):
+        if on:
+            self.enabled.add(key)
+            await self.collection.update_one(
+                {self.field: key}, {"$set": {self.field: key}}, upsert=True
+            )
+        else:
+            self.enabled.discard(key)
+            await self.collection.delete_many({self.field: key})
+
+    async def watch(self):
+        async with self.collection.watch() as stream:
+            async for _ in stream:
+                await self.load()
+
+
+async def watch_flags():
+    # Change streams need a replica set; on a standalone server this just gives up
+    try:
+        await asyncio.gather(*(flag.watch() for flag in flags))
+    except Exception as e:
+        LOGGER(__name__).warning(f"Stopped watching bot flags: {e}")
+
+
+async def load_settings():
+    await asyncio.gather(
+        *(setting.load() for setting in registry),
+        *(flag.load() for flag in flags),
+    )
+    LOGGER(__name__).info(
+        f"Loaded {sum(len(setting.cache) for setting in registry)} chat settings."
+    )
+
+
+async def flush_settings():
+    for setting in registry:
+        await setting.flush()
+
+
+async def settings_writer():
+    while not await asyncio.sleep(config.SETTINGS_FLUSH_INTERVAL):
+        try:
+            await flush_settings()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to save chat settings: {e}")
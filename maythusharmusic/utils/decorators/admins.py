@@ -3,6 +3,7 @@ from pyrogram.types import InlineKeyboardButton, InlineKeyboardMarkup
 
 from maythusharmusic import app
 from maythusharmusic.misc import SUDOERS, db
+from maythusharmusic.utils.admincache import get_admins
 from maythusharmusic.utils.database import (
     get_authuser_names,
     get_cmode,
@@ -13,7 +14,7 @@ from maythusharmusic.utils.database import (
     is_nonadmin_chat,
     is_skipmode,
 )
-from config import SUPPORT_CHAT, adminlist, confirmer
+from config import SUPPORT_CHAT, confirmer
 from strings import get_string
 
 from ..formatters import int_to_alpha
@@ -65,7 +66,7 @@ def AdminRightsCheck(mystic):
         is_non_admin = await is_nonadmin_chat(message.chat.id)
         if not is_non_admin:
             if message.from_user.id not in SUDOERS:
-                admins = adminlist.get(message.chat.id)
+                admins = await get_admins(message.chat.id)
                 if not admins:
                     return await message.reply_text(_["admin_13"])
                 else:
@@ -21,7 +21,7 @@ from maythusharmusic.utils.database import (
     is_maintenance,
 )
 from maythusharmusic.utils.inline import botplaylist_markup
-from config import PLAYLIST_IMG_URL, SUPPORT_CHAT, adminlist
+from config import PLAYLIST_IMG_URL, SUPPORT_CHAT
 from strings import get_string
 
 links = {}
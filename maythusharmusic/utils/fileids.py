@@ -0,0 +1,88 @@
+import asyncio
+
+from pyrogram.errors import (
+    FileIdInvalid,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    MediaEmpty,
+)
+
+from maythusharmusic.core.mongo import mongodb
+
+fileiddb = mongodb.fileids
+
+# What telegram answers when a stored file_id expired or is no longer valid
+STALE_ERRORS = (
+    FileIdInvalid,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    MediaEmpty,
+)
+
+# key -> telegram file_id of something the bot already uploaded, None if mongo has nothing
+_file_ids = {}
+
+
+def _extract(message):
+    for kind in ("photo", "audio", "video", "document"):
+        media = getattr(message, kind, None)
+        if media:
+            return media.file_id
+    return None
+
+
+def cached_file_id(key: str):
+    return _file_ids.get(key)
+
+
+async def get_file_id(key: str):
+    if key in _file_ids:
+        return _file_ids[key]
+    try:
+        doc = await fileiddb.find_one({"key": key})
+    except Exception:
+        return None
+    _file_ids[key] = doc["file_id"] if doc else None
+    return _file_ids[key]
+
+
+async def _store(key: str, file_id: str):
+    try:
+        if file_id:
+            await fileiddb.update_one(
+                {"key": key}, {"$set": {"file_id": file_id}}, upsert=True
+            )
+        else:
+            await fileiddb.delete_one({"key": key})
+    except Exception:
+        pass
+
+
+def save_file_id(key: str, message):
+    file_id = _extract(message)
+    if not file_id or _file_ids.get(key) == file_id:
+        return
+    _file_ids[key] = file_id
+    asyncio.ensure_future(_store(key, file_id))
+
+
+def forget_file_id(key: str):
+    _file_ids[key] = None
+    asyncio.ensure_future(_store(key, None))
+
+
+async def send_cached(key: str, send, fallback):
+    """Send the media stored under key, uploading it again if telegram rejects it.
+
+    send(media) does the actual sending, fallback() returns the local file to
+    upload when there is no file_id yet or the stored one went stale.
+    """
+    file_id = await get_file_id(key)
+    if file_id:
+        try:
+            return await send(file_id)
+        except STALE_ERRORS:
+            forget_file_id(key)
+    message = await send(await fallback())
+    save_file_id(key, message)
+    return message
@@ -27,31 +27,19 @@ def track_markup(_, videoid, user_id, channel, fplay):
     return buttons
 
 
+def progress_position(played_sec, duration_sec) -> int:
+    # Index of the knob in the 10 step progress bar
+    percentage = math.floor((played_sec / duration_sec) * 100)
+    if percentage <= 10:
+        return 0
+    if percentage >= 95:
+        return 9
+    return min(percentage // 10, 8)
+
+
 def stream_markup_timer(_, chat_id, played, dur):
-    played_sec = time_to_seconds(played)
-    duration_sec = time_to_seconds(dur)
-    percentage = (played_sec / duration_sec) * 100
-    umm = math.floor(percentage)
-    if 0 < umm <= 10:
-        bar = "◉—————————"
-    elif 10 < umm < 20:
-        bar = "—◉————————"
-    elif 20 <= umm < 30:
-        bar = "——◉———————"
-    elif 30 <= umm < 40:
-        bar = "———◉——————"
-    elif 40 <= umm < 50:
-        bar = "————◉—————"
-    elif 50 <= umm < 60:
-        bar = "—————◉————"
-    elif 60 <= umm < 70:
-        bar = "——————◉———"
-    elif 70 <= umm < 80:
-        bar = "———————◉——"
-    elif 80 <= umm < 95:
-        bar = "————————◉—"
-    else:
-        bar = "—————————◉"
+    knob = progress_position(time_to_seconds(played), time_to_seconds(dur))
+    bar = "—" * knob + "◉" + "—" * (9 - knob)
     buttons = [
         [
             InlineKeyboardButton(text="▷", callback_data=f"ADMIN Resume|{chat_id}"),
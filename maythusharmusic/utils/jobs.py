@@ -0,0 +1,289 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from pyrogram.errors import BadRequest, FloodWait, Forbidden, Unauthorized
+
+import config
+from maythusharmusic import LOGGER, app
+from maythusharmusic.core.mongo import mongodb
+from maythusharmusic.utils.formatters import get_readable_time
+from strings import get_string
+
+jobsdb = mongodb.jobs
+outcomesdb = mongodb.joboutcomes
+
+# Errors that will not go away by retrying the same target
+PERMANENT = (BadRequest, Forbidden, Unauthorized)
+
+
+class TokenBucket:
+    """Allows `rate` calls per second with bursts up to `burst`.
+
+    A FloodWait from telegram pauses every caller of the bucket, not only
+    the one that hit it.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.resume_at = 0
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.resume_at:
+                    await asyncio.sleep(self.resume_at - now)
+                    continue
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# Shared by every job so parallel jobs don't add up past telegram's limits
+limiter = TokenBucket(config.TG_RATE_LIMIT, config.TG_RATE_BURST)
+
+# kind -> {"targets", "action", "count", "finish", "record"}
+handlers = {}
+# job id -> Job
+running = {}
+
+
+def register(kind: str, targets, action, count, finish=None, record=False):
+    """Register how a kind of job is run.
+
+    targets(params, after) yields target ids in ascending order, all > after
+    action(params, target) does the work for one target and may return a
+    stats key to bump (like "pinned")
+    count(params) returns the number of targets
+    finish(job) runs once after the last target
+    record stores every target's outcome in joboutcomes
+    """
+    handlers[kind] = {
+        "targets": targets,
+        "action": action,
+        "count": count,
+        "finish": finish,
+        "record": record,
+    }
+
+
+class Job:
+    def __init__(self, doc: dict):
+        self.id = doc["_id"]
+        self.kind = doc["kind"]
+        self.params = doc["params"]
+        self.chat_id = doc["chat_id"]
+        self.message_id = doc.get("message_id")
+        self.total = doc.get("total", 0)
+        self.cursor = doc.get("cursor")
+        self.stats = doc.get("stats") or {"ok": 0, "failed": 0}
+        self.status = doc.get("status", "running")
+        self.handler = handlers[self.kind]
+        self.outcomes = []
+        self.started = time.monotonic()
+        self.done_at_start = self.done
+
+    @property
+    def done(self) -> int:
+        return self.stats["ok"] + self.stats["failed"]
+
+    def rate(self) -> float:
+        elapsed = time.monotonic() - self.started
+        if elapsed <= 0:
+            return 0
+        return (self.done - self.done_at_start) / elapsed
+
+    def eta(self) -> str:
+        rate = self.rate()
+        left = max(0, self.total - self.done)
+        if not left:
+            return "0s"
+        if not rate:
+            return "-"
+        return get_readable_time(int(left / rate)) or "0s"
+
+    def progress(self) -> str:
+        _ = get_string(self.params.get("lang", "en"))
+        return _["job_1"].format(
+            self.kind,
+            self.done,
+            self.total,
+            self.stats["ok"],
+            self.stats["failed"],
+            f"{self.rate():.1f}",
+            self.eta(),
+        )
+
+    async def checkpoint(self):
+        if self.outcomes:
+            outcomes, self.outcomes = self.outcomes, []
+            await outcomesdb.insert_many(outcomes, ordered=False)
+        await jobsdb.update_one(
+            {"_id": self.id},
+            {
+                "$set": {
+                    "cursor": self.cursor,
+                    "stats": self.stats,
+                    "status": self.status,
+                }
+            },
+        )
+
+    async def report(self):
+        if not self.message_id:
+            return
+        try:
+            await app.edit_message_text(self.chat_id, self.message_id, self.progress())
+        except FloodWait as e:
+            limiter.pause(e.value)
+        except Exception:
+            pass
+
+    async def _attempt(self, target):
+        failures = 0
+        while True:
+            await limiter.acquire()
+            try:
+                return True, await self.handler["action"](self.params, target)
+            except FloodWait as e:
+                limiter.pause(e.value)
+            except PERMANENT as e:
+                return False, type(e).__name__
+            except Exception as e:
+                failures += 1
+                if failures > config.JOB_RETRIES:
+                    return False, type(e).__name__
+                await asyncio.sleep(2**failures)
+
+    async def _work(self, target, pending: OrderedDict, window: asyncio.Semaphore):
+        try:
+            ok, result = await self._attempt(target)
+        finally:
+            window.release()
+        if ok:
+            self.stats["ok"] += 1
+            if result:
+                self.stats[result] = self.stats.get(result, 0) + 1
+        else:
+            self.stats["failed"] += 1
+        if self.handler["record"]:
+            self.outcomes.append(
+                {"job": self.id, "target": target, "ok": ok, "error": None if ok else result}
+            )
+        pending[target] = True
+        # Only move the cursor past targets with everything before them finished
+        while pending and next(iter(pending.values())):
+            self.cursor, _ = pending.popitem(last=False)
+
+    async def _ticker(self):
+        while not await asyncio.sleep(config.JOB_PROGRESS_INTERVAL):
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to checkpoint job {self.id}: {e}")
+            await self.report()
+
+    async def run(self):
+        running[self.id] = self
+        window = asyncio.Semaphore(config.JOB_CONCURRENCY)
+        pending = OrderedDict()
+        tasks = set()
+        ticker = asyncio.create_task(self._ticker())
+        try:
+            async for target in self.handler["targets"](self.params, self.cursor):
+                if self.status != "running":
+                    break
+                await window.acquire()
+                pending[target] = False
+                task = asyncio.create_task(self._work(target, pending, window))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+            if self.status == "running":
+                self.status = "done"
+        finally:
+            ticker.cancel()
+            running.pop(self.id, None)
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                LOGGER(__name__).warning(f"Failed to checkpoint job {self.id}: {e}")
+        await self.report()
+        if self.status == "done" and self.handler["finish"]:
+            await self.handler["finish"](self)
+
+
+async def start_job(kind: str, params: dict, chat_id: int, message_id: int = None) -> Job:
+    total = await handlers[kind]["count"](params)
+    doc = {
+        "_id": f"{kind}-{int(time.time() * 1000)}",
+        "kind": kind,
+        "params": params,
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "total": total,
+        "cursor": None,
+        "stats": {"ok": 0, "failed": 0},
+        "status": "running",
+        "created": time.time(),
+    }
+    await jobsdb.insert_one(doc)
+    job = Job(doc)
+    asyncio.create_task(job.run())
+    return job
+
+
+async def cancel_job(job_id: str) -> bool:
+    job = running.get(job_id)
+    if not job:
+        return False
+    job.status = "cancelled"
+    return True
+
+
+async def resume_jobs() -> int:
+    resumed = 0
+    async for doc in jobsdb.find({"status": "running"}):
+        if doc["kind"] not in handlers or doc["_id"] in running:
+            continue
+        asyncio.create_task(Job(doc).run())
+        resumed += 1
+    if resumed:
+        LOGGER(__name__).info(f"Resumed {resumed} background jobs.")
+    return resumed
+
+
+async def get_job(job_id: str):
+    job = running.get(job_id)
+    if job:
+        return job
+    doc = await jobsdb.find_one({"_id": job_id})
+    if not doc or doc["kind"] not in handlers:
+        return None
+    return Job(doc)
+
+
+async def recent_jobs(limit: int = 5) -> list:
+    jobs = list(running.values())
+    async for doc in jobsdb.find({"status": {"$ne": "running"}}).sort("created", -1).limit(limit):
+        if doc["kind"] in handlers:
+            jobs.append(Job(doc))
+    return jobs
+
+
+async def failed_targets(job_id: str) -> int:
+    return await outcomesdb.count_documents({"job": job_id, "ok": False})
@@ -0,0 +1,160 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Optional
+
+from youtubesearchpython.__future__ import VideosSearch
+
+import config
+from maythusharmusic.core.mongo import mongodb
+
+metadb = mongodb.videometa
+
+ID_REGEX = re.compile(r"(?:v=|youtu\.be/|/shorts/|/embed/|/v/)([0-9A-Za-z_-]{11})")
+
+
+class VideoMeta(NamedTuple):
+    id: str
+    title: str
+    duration: Optional[str]
+    thumbnail: Optional[str]
+    views: Optional[str]
+    channel: Optional[str]
+    channel_link: Optional[str]
+    published: Optional[str]
+    link: str
+
+
+# key -> (expires_at, [VideoMeta, ...])
+_cache = OrderedDict()
+_inflight = {}
+meta_stats = {"hits": 0, "misses": 0}
+
+
+def cache_key(query: str, limit: int = 1) -> str:
+    match = ID_REGEX.search(query)
+    if match and limit == 1:
+        return f"id:{match.group(1)}"
+    query = " ".join(query.split("&")[0].lower().split())
+    return f"q{limit}:{query}"
+
+
+def _record(result: dict) -> VideoMeta:
+    thumbnails = result.get("thumbnails") or []
+    channel = result.get("channel") or {}
+    return VideoMeta(
+        id=result["id"],
+        title=result.get("title") or "Unsupported Title",
+        duration=result.get("duration"),
+        thumbnail=thumbnails[0]["url"].split("?")[0] if thumbnails else None,
+        views=(result.get("viewCount") or {}).get("short"),
+        channel=channel.get("name"),
+        channel_link=channel.get("link"),
+        published=result.get("publishedTime"),
+        link=result.get("link") or f"https://www.youtube.com/watch?v={result['id']}",
+    )
+
+
+def _get(key: str) -> Optional[List[VideoMeta]]:
+    entry = _cache.get(key)
+    if not entry:
+        return None
+    expires, records = entry
+    if expires < time.time():
+        _cache.pop(key, None)
+        return None
+    _cache.move_to_end(key)
+    return records
+
+
+def _put(key: str, records: List[VideoMeta]):
+    expires = time.time() + config.META_CACHE_TTL
+    _cache[key] = (expires, records)
+    _cache.move_to_end(key)
+    for record in records:
+        _cache[f"id:{record.id}"] = (expires, [record])
+    while len(_cache) > config.META_CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+async def ensure_meta_indexes():
+    if not config.META_CACHE_PERSIST:
+        return
+    # Documents from before expires was a datetime are never removed by the ttl index
+    await metadb.delete_many({"expires": {"$not": {"$type": "date"}}})
+    try:
+        await metadb.create_index("key", unique=True)
+    except Exception:
+        # Racing upserts could leave duplicate keys; it is only a cache, so start over
+        await metadb.drop()
+        await metadb.create_index("key", unique=True)
+    await metadb.create_index("expires", expireAfterSeconds=0)
+
+
+async def _load(key: str) -> Optional[List[VideoMeta]]:
+    if not config.META_CACHE_PERSIST:
+        return None
+    try:
+        doc = await metadb.find_one({"key": key})
+    except Exception:
+        return None
+    # Mongo's ttl monitor only runs once a minute, so expired documents can still turn up
+    if not doc:
+        return None
+    expires = doc.get("expires")
+    if not isinstance(expires, datetime) or expires < datetime.utcnow():
+        return None
+    return [VideoMeta(**item) for item in doc["records"]]
+
+
+async def _save(key: str, records: List[VideoMeta]):
+    if not config.META_CACHE_PERSIST:
+        return
+    try:
+        await metadb.update_one(
+            {"key": key},
+            {
+                "$set": {
+                    "records": [record._asdict() for record in records],
+                    "expires": datetime.utcnow()
+                    + timedelta(seconds=config.META_CACHE_TTL),
+                }
+            },
+            upsert=True,
+        )
+    except Exception:
+        pass
+
+
+async def _fetch(key: str, query: str, limit: int) -> List[VideoMeta]:
+    records = await _load(key)
+    if records is None:
+        results = (await VideosSearch(query, limit=limit).next()).get("result") or []
+        records = [_record(result) for result in results]
+        if records:
+            asyncio.ensure_future(_save(key, records))
+    if records:
+        _put(key, records)
+    return records
+
+
+async def search(query: str, limit: int = 1) -> List[VideoMeta]:
+    key = cache_key(query, limit)
+    records = _get(key)
+    if records is not None:
+        meta_stats["hits"] += 1
+        return records
+    meta_stats["misses"] += 1
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch(key, query, limit))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def get_meta(query: str) -> Optional[VideoMeta]:
+    records = await search(query)
+    return records[0] if records else None
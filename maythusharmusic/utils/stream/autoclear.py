@@ -1,18 +1,120 @@
+import asyncio
 import os
+import time
+from collections import Counter
 
-from config import autoclean
+import config
+from maythusharmusic.misc import db
+
+CACHE_DIRS = ["downloads", "playback"]
+CACHE_LIMIT = config.MEDIA_CACHE_LIMIT * 1024 * 1024
+
+# path -> {"size": bytes, "atime": last access}
+media = {}
+cache_stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+def cache_hit(path: str):
+    cache_stats["hits"] += 1
+    touch(path)
+
+
+def cache_miss():
+    cache_stats["misses"] += 1
+
+
+def touch(path: str):
+    try:
+        size = os.path.getsize(path)
+    except (OSError, TypeError):
+        return
+    media[os.path.abspath(path)] = {"size": size, "atime": time.time()}
+
+
+def references() -> Counter:
+    refs = Counter()
+    for queue in list(db.values()):
+        for track in list(queue or []):
+            for key in ("file", "speed_path", "prefetched", "downloaded"):
+                path = track.get(key)
+                if path:
+                    refs[os.path.abspath(str(path))] += 1
+    return refs
+
+
+def _scan(known: set):
+    """Walk the cache folders, returning every file and the stat of new ones.
+
+    Runs in a thread, so it only reads the snapshot it is given.
+    """
+    seen, found = set(), {}
+    for folder in CACHE_DIRS:
+        for root, _, files in os.walk(folder):
+            for name in files:
+                if name.endswith(".part"):
+                    continue
+                path = os.path.abspath(os.path.join(root, name))
+                seen.add(path)
+                if path not in known:
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = {"size": stat.st_size, "atime": stat.st_mtime}
+    return seen, found
+
+
+def _remove(paths: list) -> list:
+    removed = []
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed.append(path)
+    return removed
+
+
+def cache_usage() -> int:
+    return sum(entry["size"] for entry in media.values())
+
+
+async def evict() -> int:
+    loop = asyncio.get_running_loop()
+    # The walk, stats and deletes run in a thread, media is only changed here
+    seen, found = await loop.run_in_executor(None, _scan, set(media))
+    for path in list(media):
+        if path not in seen:
+            media.pop(path, None)
+    for path, entry in found.items():
+        media.setdefault(path, entry)
+    total = cache_usage()
+    if total <= CACHE_LIMIT:
+        return 0
+    refs = references()
+    victims = []
+    for path, entry in sorted(media.items(), key=lambda item: item[1]["atime"]):
+        if total <= CACHE_LIMIT:
+            break
+        if refs.get(path):
+            continue
+        victims.append(path)
+        total -= entry["size"]
+    freed = 0
+    for path in await loop.run_in_executor(None, _remove, victims):
+        entry = media.pop(path, None)
+        if entry:
+            freed += entry["size"]
+        cache_stats["evicted"] += 1
+    return freed
 
 
 async def auto_clean(popped):
     try:
-        rem = popped["file"]
-        autoclean.remove(rem)
-        count = autoclean.count(rem)
-        if count == 0:
-            if "vid_" not in rem or "live_" not in rem or "index_" not in rem:
-                try:
-                    os.remove(rem)
-                except:
-                    pass
+        if popped:
+            touch(popped["file"])
+            if popped.get("speed_path"):
+                touch(popped["speed_path"])
+        await evict()
     except:
         pass
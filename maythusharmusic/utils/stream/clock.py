@@ -0,0 +1,59 @@
+import time
+
+from maythusharmusic.misc import db
+
+# Every queue entry keeps "played" (seconds played until "anchor") and
+# "anchor" (monotonic time playback last resumed, None while paused).
+
+
+def _track(chat_id: int):
+    queue = db.get(chat_id)
+    if not queue:
+        return None
+    return queue[0]
+
+
+def position(chat_id: int) -> int:
+    track = _track(chat_id)
+    if not track:
+        return 0
+    played = track.get("played", 0)
+    anchor = track.get("anchor")
+    if anchor is not None:
+        played += time.monotonic() - anchor
+    seconds = int(track.get("seconds") or 0)
+    if seconds:
+        played = min(played, seconds)
+    return int(played)
+
+
+def seek_clock(chat_id: int, seconds: int):
+    track = _track(chat_id)
+    if not track:
+        return
+    track["played"] = max(0, int(seconds))
+    if track.get("anchor") is not None:
+        track["anchor"] = time.monotonic()
+
+
+def start_clock(chat_id: int):
+    track = _track(chat_id)
+    if not track:
+        return
+    track["played"] = 0
+    track["anchor"] = time.monotonic()
+
+
+def pause_clock(chat_id: int):
+    track = _track(chat_id)
+    if not track or track.get("anchor") is None:
+        return
+    track["played"] = position(chat_id)
+    track["anchor"] = None
+
+
+def resume_clock(chat_id: int):
+    track = _track(chat_id)
+    if not track or track.get("anchor") is not None:
+        return
+    track["anchor"] = time.monotonic()
@@ -0,0 +1,57 @@
+import asyncio
+import os
+
+import config
+from maythusharmusic import YouTube
+from maythusharmusic.misc import db
+from maythusharmusic.utils.stream.autoclear import CACHE_LIMIT, cache_usage, touch
+
+semaphore = asyncio.Semaphore(config.PREFETCH_CONCURRENCY)
+prefetching = {}
+
+
+def _key(track: dict):
+    return track["vidid"], str(track["streamtype"]) == "video"
+
+
+async def _download(key):
+    vidid, video = key
+    async with semaphore:
+        if cache_usage() >= CACHE_LIMIT:
+            return None
+        try:
+            file_path, direct = await YouTube.download(
+                vidid, None, videoid=True, video=video
+            )
+        except:
+            return None
+    if not direct or not file_path or not os.path.isfile(file_path):
+        return None
+    touch(file_path)
+    for queue in list(db.values()):
+        for track in list(queue or []):
+            if "vid_" in str(track.get("file")) and _key(track) == key:
+                track["prefetched"] = file_path
+    return file_path
+
+
+def prefetch(chat_id: int):
+    queue = db.get(chat_id)
+    if not queue or config.PREFETCH_DEPTH <= 0:
+        return
+    for track in list(queue[1 : 1 + config.PREFETCH_DEPTH]):
+        if "vid_" not in str(track.get("file")) or get_prefetched(track):
+            continue
+        key = _key(track)
+        if key in prefetching:
+            continue
+        task = asyncio.ensure_future(_download(key))
+        prefetching[key] = task
+        task.add_done_callback(lambda _, key=key: prefetching.pop(key, None))
+
+
+def get_prefetched(track: dict):
+    path = track.get("prefetched")
+    if path and os.path.isfile(path):
+        return path
+    return None
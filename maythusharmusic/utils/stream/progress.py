@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+from pyrogram.errors import FloodWait, MessageNotModified
+from pyrogram.types import InlineKeyboardMarkup
+
+import config
+from maythusharmusic import LOGGER
+from maythusharmusic.misc import db
+from maythusharmusic.utils.database import get_active_chats, get_lang, is_music_playing
+from maythusharmusic.utils.formatters import seconds_to_min
+from maythusharmusic.utils.inline import progress_position, stream_markup_timer
+from maythusharmusic.utils.jobs import TokenBucket
+from maythusharmusic.utils.stream.clock import position
+from strings import get_string
+
+# Caps progress bar edits across all chats, separate from the job limiter
+edits = TokenBucket(config.PROGRESS_EDIT_RATE, max(1, int(config.PROGRESS_EDIT_RATE)))
+
+# chat_id -> {"message", "knob", "failures", "retry_at"} of the last edit
+_state = {}
+# Chats with an edit still waiting for its slot
+_editing = set()
+
+
+def _due(chat_id: int, now: float):
+    """Return the now playing message and knob position if its bar moved."""
+    playing = db.get(chat_id)
+    if not playing:
+        return None
+    track = playing[0]
+    mystic = track.get("mystic")
+    duration = int(track.get("seconds") or 0)
+    if not mystic or not duration:
+        return None
+    knob = progress_position(position(chat_id), duration)
+    state = _state.get(chat_id)
+    if not state or state["message"] != mystic.id:
+        state = _state[chat_id] = {
+            "message": mystic.id,
+            "knob": None,
+            "failures": 0,
+            "retry_at": 0,
+        }
+    if chat_id in _editing or state["knob"] == knob or state["retry_at"] > now:
+        return None
+    return mystic, knob
+
+
+async def _edit(chat_id: int, mystic, knob: int):
+    try:
+        await _send(chat_id, mystic, knob)
+    finally:
+        _editing.discard(chat_id)
+
+
+async def _send(chat_id: int, mystic, knob: int):
+    await edits.acquire()
+    state = _state.get(chat_id)
+    playing = db.get(chat_id)
+    # The track may have changed while this edit waited for its slot
+    if not state or not playing or playing[0].get("mystic") is not mystic:
+        return
+    try:
+        _ = get_string(await get_lang(chat_id))
+    except:
+        _ = get_string("en")
+    buttons = stream_markup_timer(
+        _, chat_id, seconds_to_min(position(chat_id)), playing[0]["dur"]
+    )
+    try:
+        await mystic.edit_reply_markup(reply_markup=InlineKeyboardMarkup(buttons))
+    except MessageNotModified:
+        pass
+    except FloodWait as e:
+        edits.pause(e.value)
+        return
+    except Exception:
+        state["failures"] += 1
+        state["retry_at"] = time.monotonic() + config.PROGRESS_INTERVAL * 2 ** min(
+            state["failures"], 6
+        )
+        return
+    state["knob"] = knob
+    state["failures"] = 0
+
+
+async def _tick(started: float):
+    active = set(await get_active_chats())
+    for chat_id in list(_state):
+        if chat_id not in active:
+            _state.pop(chat_id, None)
+    due = []
+    for chat_id in active:
+        try:
+            if not await is_music_playing(chat_id):
+                continue
+            found = _due(chat_id, started)
+        except Exception:
+            continue
+        if found:
+            due.append((chat_id, *found))
+    step = config.PROGRESS_INTERVAL / len(due) if due else 0
+    for index, (chat_id, mystic, knob) in enumerate(due):
+        delay = started + index * step - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        _editing.add(chat_id)
+        asyncio.create_task(_edit(chat_id, mystic, knob))
+
+
+async def progress_updater():
+    """Edit the now playing progress bars.
+
+    Only chats whose bar moved since their last edit are touched, and those
+    edits are spread evenly over the interval instead of sent in one burst.
+    """
+    while True:
+        started = time.monotonic()
+        try:
+            await _tick(started)
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to update progress bars: {e}")
+        await asyncio.sleep(max(started + config.PROGRESS_INTERVAL - time.monotonic(), 1))
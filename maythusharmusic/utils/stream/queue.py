@@ -3,7 +3,10 @@ from typing import Union
 from pyrogram import Client, client
 from maythusharmusic.misc import db
 from maythusharmusic.utils.formatters import check_duration, seconds_to_min
-from config import autoclean, time_to_seconds
+from maythusharmusic.utils.stream.autoclear import touch
+from maythusharmusic.utils.stream.clock import start_clock
+from maythusharmusic.utils.stream.prefetch import prefetch
+from config import time_to_seconds
 
 
 async def put_queue(
@@ -44,7 +47,10 @@ async def put_queue(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
-    autoclean.append(file)
+    if db[chat_id][0] is put:
+        start_clock(chat_id)
+    touch(file)
+    prefetch(chat_id)
 
 
 async def put_queue_index(
@@ -89,3 +95,5 @@ async def put_queue_index(
             db[chat_id].append(put)
     else:
         db[chat_id].append(put)
+    if db[chat_id][0] is put:
+        start_clock(chat_id)
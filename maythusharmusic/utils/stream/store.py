@@ -0,0 +1,125 @@
+import asyncio
+import os
+
+from pymongo import DeleteOne, ReplaceOne
+
+import config
+from maythusharmusic import LOGGER, YouTube
+from maythusharmusic.core.mongo import mongodb
+from maythusharmusic.misc import db
+from maythusharmusic.utils.database import is_active_chat
+from maythusharmusic.utils.stream.clock import start_clock
+
+queuedb = mongodb.queues
+
+KEYS = (
+    "title",
+    "dur",
+    "streamtype",
+    "by",
+    "user_id",
+    "chat_id",
+    "file",
+    "vidid",
+    "seconds",
+    "old_dur",
+    "old_second",
+)
+
+# chat_id -> last snapshot written to mongo
+written = {}
+
+
+def snapshot(queue: list) -> list:
+    return [{key: track[key] for key in KEYS if key in track} for track in queue]
+
+
+async def flush_queues():
+    current = {}
+    for chat_id, queue in list(db.items()):
+        if queue:
+            current[chat_id] = snapshot(list(queue))
+    ops = []
+    for chat_id, snap in current.items():
+        if written.get(chat_id) != snap:
+            ops.append(
+                ReplaceOne(
+                    {"chat_id": chat_id},
+                    {"chat_id": chat_id, "queue": snap},
+                    upsert=True,
+                )
+            )
+    for chat_id in written:
+        if chat_id not in current:
+            ops.append(DeleteOne({"chat_id": chat_id}))
+    if ops:
+        await queuedb.bulk_write(ops, ordered=False)
+    written.clear()
+    written.update(current)
+
+
+async def queue_writer():
+    while not await asyncio.sleep(config.QUEUE_FLUSH_INTERVAL):
+        try:
+            await flush_queues()
+        except Exception as e:
+            LOGGER(__name__).warning(f"Failed to save queues: {e}")
+
+
+async def _playable(track: dict):
+    file = str(track["file"])
+    video = str(track["streamtype"]) == "video"
+    if "live_" in file:
+        n, link = await YouTube.video(track["vidid"], True)
+        return link if n else None
+    if "index_" in file:
+        return track["vidid"]
+    if "vid_" in file or (
+        not os.path.isfile(file) and track["vidid"] not in ("telegram", "soundcloud")
+    ):
+        file_path, direct = await YouTube.download(
+            track["vidid"], None, videoid=True, video=video
+        )
+        if direct:
+            track["file"] = file_path
+        return file_path
+    return file if os.path.isfile(file) else None
+
+
+async def restore_queues(call):
+    restored = 0
+    loaded = {}
+    async for doc in queuedb.find({}):
+        chat_id = doc["chat_id"]
+        queue = doc.get("queue") or []
+        loaded[chat_id] = queue
+        if not queue:
+            continue
+        # Commands are answered before this runs, a chat may already play again
+        if db.get(chat_id) or await is_active_chat(chat_id):
+            continue
+        for track in queue:
+            track["played"] = 0
+        try:
+            link = await _playable(queue[0])
+            if not link:
+                raise ValueError("Nothing to play")
+            # The queue is only published once its first track is ready,
+            # and not over one a /play started in the meantime
+            if await is_active_chat(chat_id) or db.get(chat_id):
+                continue
+            db[chat_id] = queue
+            await call.join_call(
+                chat_id,
+                queue[0]["chat_id"],
+                link,
+                video=True if str(queue[0]["streamtype"]) == "video" else None,
+            )
+            start_clock(chat_id)
+            restored += 1
+        except Exception as e:
+            LOGGER(__name__).warning(f"Couldn't restore queue of {chat_id}: {e}")
+            if db.get(chat_id) is queue:
+                db.pop(chat_id, None)
+    written.update(loaded)
+    LOGGER(__name__).info(f"Restored {restored} queues.")
@@ -0,0 +1,278 @@
+import random
+import time
+from functools import lru_cache
+
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
+
+# Lives outside the maythusharmusic package, whose __init__ starts the bot's
+# clients, so spawned render workers import nothing but PIL and the standard
+# library. It also runs on its own as a benchmark:
+#   python thumbrender.py [image] [runs]
+
+ASSETS = "maythusharmusic/assets/assets"
+
+ARIAL = ImageFont.truetype(f"{ASSETS}/font2.ttf", 30)
+TITLE_FONT = ImageFont.truetype(f"{ASSETS}/font3.ttf", 45)
+PLAY_ICONS = Image.open(f"{ASSETS}/play_icons.png").convert("RGBA").resize((580, 62))
+
+
+def changeImageSize(maxWidth, maxHeight, image):
+    widthRatio = maxWidth / image.size[0]
+    heightRatio = maxHeight / image.size[1]
+    newWidth = int(widthRatio * image.size[0])
+    newHeight = int(heightRatio * image.size[1])
+    newImage = image.resize((newWidth, newHeight))
+    return newImage
+
+def truncate(text):
+    list = text.split(" ")
+    text1 = ""
+    text2 = ""
+    for i in list:
+        if len(text1) + len(i) < 30:
+            text1 += " " + i
+        elif len(text2) + len(i) < 30:
+            text2 += " " + i
+
+    text1 = text1.strip()
+    text2 = text2.strip()
+    return [text1,text2]
+
+def random_color(rng=random):
+    return (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+
+@lru_cache(maxsize=8)
+def gradient_mask(width, height):
+    column = Image.new('L', (1, height))
+    column.putdata([int(60 * (y / height)) for y in range(height)])
+    return column.resize((width, height), Image.NEAREST)
+
+def generate_gradient(width, height, start_color, end_color):
+    base = Image.new('RGB', (width, height), start_color)
+    top = Image.new('RGB', (width, height), end_color)
+    return Image.composite(top, base, gradient_mask(width, height))
+
+@lru_cache(maxsize=8)
+def circle_mask(size):
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size, size), fill=255)
+    return mask
+
+def add_border(image, border_width, border_color):
+    width, height = image.size
+    new_width = width + 2 * border_width
+    new_height = height + 2 * border_width
+    new_image = Image.new("RGBA", (new_width, new_height), border_color)
+    new_image.paste(image, (border_width, border_width))
+    return new_image
+
+def crop_center_circle(img, output_size, border, border_color, crop_scale=1.5):
+    half_the_width = img.size[0] / 2
+    half_the_height = img.size[1] / 2
+    larger_size = int(output_size * crop_scale)
+    img = img.crop(
+        (
+            half_the_width - larger_size/2,
+            half_the_height - larger_size/2,
+            half_the_width + larger_size/2,
+            half_the_height + larger_size/2
+        )
+    )
+
+    img = img.resize((output_size - 2*border, output_size - 2*border))
+
+    result = Image.new("RGBA", (output_size, output_size), (0, 0, 0, 0))
+    result.paste(border_color, (0, 0), circle_mask(output_size))
+    result.paste(img, (border, border), circle_mask(output_size - 2*border))
+
+    return result
+
+def draw_text_with_shadow(background, draw, position, text, font, fill, shadow_offset=(3, 3), shadow_blur=5):
+    if not text:
+        return
+
+    # Blur only the text's own box (plus room for the blur) instead of a full canvas layer
+    left, top, right, bottom = draw.textbbox(position, text, font=font)
+    pad = shadow_blur * 3
+    left, top, right, bottom = left - pad, top - pad, right + pad, bottom + pad
+
+    shadow = Image.new('L', (right - left, bottom - top), 0)
+    ImageDraw.Draw(shadow).text((position[0] - left, position[1] - top), text, font=font, fill=255)
+    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=shadow_blur))
+
+    background.paste((0, 0, 0), (left + shadow_offset[0], top + shadow_offset[1]), shadow)
+
+    draw.text(position, text, font=font, fill=fill)
+
+def render(videoid, image_path, title, duration, views, channel):
+    started = time.perf_counter()
+    # Seeded per video so the same track always renders the same picture
+    rng = random.Random(videoid)
+    youtube = Image.open(image_path)
+    youtube.load()
+    image1 = changeImageSize(1280, 720, youtube)
+
+    background = image1.convert("RGB").filter(ImageFilter.BoxBlur(20))
+    background = ImageEnhance.Brightness(background).enhance(0.6)
+
+    start_gradient_color = random_color(rng)
+    end_gradient_color = random_color(rng)
+    gradient_image = generate_gradient(1280, 720, start_gradient_color, end_gradient_color)
+    background = Image.blend(background, gradient_image, alpha=0.2)
+
+    draw = ImageDraw.Draw(background)
+
+    circle_thumbnail = crop_center_circle(youtube, 400, 20, start_gradient_color)
+    circle_position = (120, 160)
+    background.paste(circle_thumbnail, circle_position, circle_thumbnail)
+
+    text_x_position = 565
+    title1 = truncate(title)
+    draw_text_with_shadow(background, draw, (text_x_position, 180), title1[0], TITLE_FONT, (255, 255, 255))
+    draw_text_with_shadow(background, draw, (text_x_position, 230), title1[1], TITLE_FONT, (255, 255, 255))
+    draw_text_with_shadow(background, draw, (text_x_position, 320), f"{channel}  |  {views[:23]}", ARIAL, (255, 255, 255))
+
+
+    line_length = 580
+    line_color = random_color(rng)
+
+    if duration != "Live":
+        color_line_percentage = rng.uniform(0.15, 0.85)
+        color_line_length = int(line_length * color_line_percentage)
+
+        start_point_color = (text_x_position, 380)
+        end_point_color = (text_x_position + color_line_length, 380)
+        draw.line([start_point_color, end_point_color], fill=line_color, width=9)
+
+        start_point_white = (text_x_position + color_line_length, 380)
+        end_point_white = (text_x_position + line_length, 380)
+        draw.line([start_point_white, end_point_white], fill="white", width=8)
+
+    else:
+        line_color = (255, 0, 0)
+        start_point_color = (text_x_position, 380)
+        end_point_color = (text_x_position + line_length, 380)
+        draw.line([start_point_color, end_point_color], fill=line_color, width=9)
+
+    circle_radius = 10
+    circle_position = (end_point_color[0], end_point_color[1])
+    draw.ellipse([circle_position[0] - circle_radius, circle_position[1] - circle_radius,
+                  circle_position[0] + circle_radius, circle_position[1] + circle_radius], fill=line_color)
+
+    draw_text_with_shadow(background, draw, (text_x_position, 400), "00:00", ARIAL, (255, 255, 255))
+    draw_text_with_shadow(background, draw, (1080, 400), duration, ARIAL, (255, 255, 255))
+
+    background.paste(PLAY_ICONS, (text_x_position, 450), PLAY_ICONS)
+
+    background_path = f"cache/{videoid}_v4.png"
+    background.save(background_path, compress_level=1)
+    return background_path, time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    import os
+    import statistics
+    import sys
+
+    # The compositing path as it was before the primitives above were
+    # optimised, kept here only so the benchmark can time both.
+    def baseline_gradient(width, height, start_color, end_color):
+        base = Image.new('RGBA', (width, height), start_color)
+        top = Image.new('RGBA', (width, height), end_color)
+        mask = Image.new('L', (width, height))
+        mask_data = []
+        for y in range(height):
+            mask_data.extend([int(60 * (y / height))] * width)
+        mask.putdata(mask_data)
+        base.paste(top, (0, 0), mask)
+        return base
+
+    def baseline_circle(img, output_size, border, border_color, crop_scale=1.5):
+        half_the_width = img.size[0] / 2
+        half_the_height = img.size[1] / 2
+        larger_size = int(output_size * crop_scale)
+        img = img.crop(
+            (
+                half_the_width - larger_size/2,
+                half_the_height - larger_size/2,
+                half_the_width + larger_size/2,
+                half_the_height + larger_size/2
+            )
+        )
+        img = img.resize((output_size - 2*border, output_size - 2*border))
+        final_img = Image.new("RGBA", (output_size, output_size), border_color)
+        mask_main = Image.new("L", (output_size - 2*border, output_size - 2*border), 0)
+        ImageDraw.Draw(mask_main).ellipse((0, 0, output_size - 2*border, output_size - 2*border), fill=255)
+        final_img.paste(img, (border, border), mask_main)
+        mask_border = Image.new("L", (output_size, output_size), 0)
+        ImageDraw.Draw(mask_border).ellipse((0, 0, output_size, output_size), fill=255)
+        return Image.composite(final_img, Image.new("RGBA", final_img.size, (0, 0, 0, 0)), mask_border)
+
+    def baseline_shadow(background, draw, position, text, font, fill, shadow_offset=(3, 3), shadow_blur=5):
+        shadow = Image.new('RGBA', background.size, (0, 0, 0, 0))
+        ImageDraw.Draw(shadow).text(position, text, font=font, fill="black")
+        shadow = shadow.filter(ImageFilter.GaussianBlur(radius=shadow_blur))
+        background.paste(shadow, shadow_offset, shadow)
+        draw.text(position, text, font=font, fill=fill)
+
+    def baseline_render(videoid, image_path, title, duration, views, channel):
+        started = time.perf_counter()
+        youtube = Image.open(image_path)
+        image1 = changeImageSize(1280, 720, youtube)
+        background = image1.convert("RGBA").filter(filter=ImageFilter.BoxBlur(20))
+        background = ImageEnhance.Brightness(background).enhance(0.6)
+        start_gradient_color = random_color()
+        end_gradient_color = random_color()
+        gradient_image = baseline_gradient(1280, 720, start_gradient_color, end_gradient_color)
+        background = Image.blend(background, gradient_image, alpha=0.2)
+        draw = ImageDraw.Draw(background)
+        arial = ImageFont.truetype(f"{ASSETS}/font2.ttf", 30)
+        ImageFont.truetype(f"{ASSETS}/font.ttf", 30)
+        title_font = ImageFont.truetype(f"{ASSETS}/font3.ttf", 45)
+        circle_thumbnail = baseline_circle(youtube, 400, 20, start_gradient_color)
+        circle_thumbnail = circle_thumbnail.resize((400, 400))
+        background.paste(circle_thumbnail, (120, 160), circle_thumbnail)
+        text_x_position = 565
+        title1 = truncate(title)
+        baseline_shadow(background, draw, (text_x_position, 180), title1[0], title_font, (255, 255, 255))
+        baseline_shadow(background, draw, (text_x_position, 230), title1[1], title_font, (255, 255, 255))
+        baseline_shadow(background, draw, (text_x_position, 320), f"{channel}  |  {views[:23]}", arial, (255, 255, 255))
+        line_length = 580
+        line_color = random_color()
+        color_line_length = int(line_length * random.uniform(0.15, 0.85))
+        end_point_color = (text_x_position + color_line_length, 380)
+        draw.line([(text_x_position, 380), end_point_color], fill=line_color, width=9)
+        draw.line([end_point_color, (text_x_position + line_length, 380)], fill="white", width=8)
+        draw.ellipse([end_point_color[0] - 10, end_point_color[1] - 10,
+                      end_point_color[0] + 10, end_point_color[1] + 10], fill=line_color)
+        baseline_shadow(background, draw, (text_x_position, 400), "00:00", arial, (255, 255, 255))
+        baseline_shadow(background, draw, (1080, 400), duration, arial, (255, 255, 255))
+        play_icons = Image.open(f"{ASSETS}/play_icons.png").resize((580, 62))
+        background.paste(play_icons, (text_x_position, 450), play_icons)
+        background_path = f"cache/{videoid}_v4.png"
+        background.save(background_path)
+        return background_path, time.perf_counter() - started
+
+    image = sys.argv[1] if len(sys.argv) > 1 else f"{ASSETS}/play_icons.png"
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    os.makedirs("cache", exist_ok=True)
+    medians = {}
+    for name, renderer in (("baseline", baseline_render), ("current", render)):
+        timings = []
+        for _ in range(runs):
+            path, took = renderer(
+                f"benchmark_{name}",
+                image,
+                "Some Fairly Long Song Title Official Music Video",
+                "3:45",
+                "1.2M views",
+                "Channel Name",
+            )
+            timings.append(took * 1000)
+        os.remove(path)
+        medians[name] = statistics.median(timings)
+        print(
+            f"{name:>8}: {runs} renders, median {medians[name]:.1f} ms, "
+            f"min {min(timings):.1f} ms, max {max(timings):.1f} ms"
+        )
+    print(f"speedup: {medians['baseline'] / medians['current']:.2f}x")